@@ -0,0 +1,180 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import Iterable, Optional, Tuple
+from email_utils import EmailValidator
+
+
+class BloomBlocklist:
+    """Read-only, memory-mapped blocklist for very large shared lists.
+
+    The file holds three sections after a fixed header:
+
+    - a Bloom filter that answers "definitely not listed" for almost every
+      sender without touching the rest of the file,
+    - a sorted array of ``(hash, offset)`` pairs,
+    - the newline-separated entries themselves.
+
+    A Bloom hit is confirmed by binary-searching the hash array and
+    comparing the stored entry, so false positives never block mail. The
+    whole file is mmapped, so opening a multi-million entry list costs no
+    parsing and only the pages that are touched are read.
+
+    Entries are lower-cased addresses or ``@domain`` for whole domains.
+    Files are produced by the ``build`` command of this module.
+    """
+
+    MAGIC = b"EBLF"
+    VERSION = 1
+    # magic, version, bit count, hash count, entry count
+    _HEADER = struct.Struct("<4sIQIQ")
+    _INDEX_ENTRY = struct.Struct("<QQ")
+    _HASH = struct.Struct("<QQ")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.num_bits, self.num_hashes, self.count = self._HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {self.VERSION} blocklist file.")
+
+        self._bits_offset = self._HEADER.size
+        self._index_offset = self._bits_offset + (self.num_bits + 7) // 8
+        self._strings_offset = self._index_offset + self.count * self._INDEX_ENTRY.size
+
+    def __contains__(self, entry: str) -> bool:
+        """Check whether an address or ``@domain`` is on the list."""
+        if not entry or not self.count:
+            return False
+
+        data = entry.lower().encode("utf-8")
+        h1, h2 = self._hashes(data)
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            if not self._mm[self._bits_offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return self._confirm(h1, data)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mm.close()
+
+    def _confirm(self, key: int, data: bytes) -> bool:
+        """Binary-search the hash index and compare the stored entries for ``key``."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._index_at(mid)[0] < key:
+                low = mid + 1
+            else:
+                high = mid
+
+        # Different entries can share a 64-bit hash; check every one of them
+        while low < self.count:
+            entry_hash, offset = self._index_at(low)
+            if entry_hash != key:
+                return False
+            start = self._strings_offset + offset
+            if self._mm[start:self._mm.find(b"\n", start)] == data:
+                return True
+            low += 1
+        return False
+
+    def _index_at(self, position: int) -> Tuple[int, int]:
+        return self._INDEX_ENTRY.unpack_from(self._mm, self._index_offset + position * self._INDEX_ENTRY.size)
+
+    @classmethod
+    def _hashes(cls, data: bytes) -> Tuple[int, int]:
+        """Two 64-bit hashes for double hashing; the second is odd so it never repeats a bit."""
+        h1, h2 = cls._HASH.unpack(hashlib.blake2b(data, digest_size=16).digest())
+        return h1, h2 | 1
+
+    @staticmethod
+    def normalize_entry(line: str) -> Optional[str]:
+        """Turn a list line into a stored entry, or None if it should be skipped.
+
+        Accepts addresses, ``@domain`` and ``*@domain``; blank lines and
+        ``#`` comments are skipped.
+        """
+        entry = line.strip().lower()
+        if not entry or entry.startswith("#"):
+            return None
+        if entry.startswith("*@"):
+            entry = entry[1:]
+        if entry.startswith("@"):
+            return entry if "." in entry and " " not in entry else None
+        return entry if EmailValidator.is_valid_email(entry) else None
+
+    @classmethod
+    def build(cls, entries: Iterable[str], path: str, false_positive_rate: float = 0.001) -> int:
+        """Compile entries into a blocklist file; returns the number stored."""
+        keys = sorted({entry.encode("utf-8") for entry in entries})
+        count = len(keys)
+
+        # Standard Bloom sizing for the requested false-positive rate
+        num_bits = max(64, math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / max(count, 1) * math.log(2)))
+
+        bits = bytearray((num_bits + 7) // 8)
+        index = []
+        offset = 0
+        for data in keys:
+            h1, h2 = cls._hashes(data)
+            for i in range(num_hashes):
+                bit = (h1 + i * h2) % num_bits
+                bits[bit >> 3] |= 1 << (bit & 7)
+            index.append((h1, offset))
+            offset += len(data) + 1
+        index.sort()
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(cls._HEADER.pack(cls.MAGIC, cls.VERSION, num_bits, num_hashes, count))
+            f.write(bits)
+            for entry_hash, entry_offset in index:
+                f.write(cls._INDEX_ENTRY.pack(entry_hash, entry_offset))
+            for data in keys:
+                f.write(data + b"\n")
+        os.replace(temp_path, path)
+        return count
+
+
+def main():
+    """Command-line tool to build and query blocklist files."""
+    parser = argparse.ArgumentParser(description="Build or query a shared Bloom-filter blocklist.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Compile a text list (one entry per line).")
+    build_parser.add_argument("source", help="Text file of addresses, @domain or *@domain entries")
+    build_parser.add_argument("output", help="Blocklist file to write")
+    build_parser.add_argument("--fp-rate", type=float, default=0.001,
+                              help="Target Bloom filter false-positive rate (default: 0.001)")
+
+    check_parser = subparsers.add_parser("check", help="Look up entries in a built list.")
+    check_parser.add_argument("blocklist", help="Blocklist file to query")
+    check_parser.add_argument("entries", nargs="+", help="Addresses or @domain entries")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        with open(args.source, "r", encoding="utf-8-sig") as f:
+            entries = [entry for entry in map(BloomBlocklist.normalize_entry, f) if entry]
+        count = BloomBlocklist.build(entries, args.output, args.fp_rate)
+        print(f"Wrote {count} entries to {args.output}")
+    else:
+        blocklist = BloomBlocklist(args.blocklist)
+        for entry in args.entries:
+            print(f"{entry}: {'listed' if entry in blocklist else 'not listed'}")
+        blocklist.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from claude_service import ClaudeService
+from claude_stub_server import ClaudeStubServer
+from config import config
+from email_preprocessor import EmailPreprocessor
+
+
+# Each call returns something truthy on success
+CALLS: Dict[str, Callable[[ClaudeService, Dict[str, str]], object]] = {
+    "checklist": lambda service, email: service.generate_checklist_item(
+        email["subject"], email["body"], email["sender"]
+    ),
+    "multiple": lambda service, email: service.generate_multiple_checklist_items(
+        email["subject"], email["body"], email["sender"], count=3
+    ),
+    "summary": lambda service, email: service.summarize_email(
+        email["subject"], email["body"], email["sender"]
+    )
+}
+
+SAMPLE_BODY = """Hi,
+
+Could you please review the attached budget and send me your comments by Friday?
+We need to confirm the numbers before the planning meeting next week.
+
+Thanks,
+Sam"""
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def sample_emails(count: int) -> List[Dict[str, str]]:
+    """Distinct emails, so no two requests share a response cache entry."""
+    return [
+        {
+            "id": str(n),
+            "subject": f"Budget review #{n}",
+            "sender": f"Sam Example <sam{n}@example.com>",
+            "body": SAMPLE_BODY
+        }
+        for n in range(count)
+    ]
+
+
+def run_level(service: ClaudeService, call: str, emails: List[Dict[str, str]], concurrency: int) -> Dict[str, float]:
+    """Send every email through one call type at a fixed concurrency and time each request."""
+    def timed(email: Dict[str, str]):
+        start = time.perf_counter()
+        ok = bool(CALLS[call](service, email))
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, emails))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput": len(results) / elapsed if elapsed else 0.0
+    }
+
+
+def main():
+    """Benchmark ClaudeService against the API at CLAUDE_BASE_URL or a bundled stub."""
+    parser = argparse.ArgumentParser(description="Measure ClaudeService latency and throughput.")
+    parser.add_argument("--stub", action="store_true", help="Start a local stub server and benchmark against it")
+    parser.add_argument("--base-url", help="API endpoint (default: CLAUDE_BASE_URL)")
+    parser.add_argument("--calls", default=",".join(CALLS),
+                        help=f"Comma-separated calls to run (default: {','.join(CALLS)})")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels (default: 1,4,8)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per call and level (default: 50)")
+    parser.add_argument("--timeout", type=float, help="Read timeout per request in seconds")
+    parser.add_argument("--max-retries", type=int, help="Retries per request (default: CLAUDE_MAX_RETRIES)")
+    stub_group = parser.add_argument_group("stub server")
+    stub_group.add_argument("--latency", type=float, default=0.2, help="Seconds before each response (default: 0.2)")
+    stub_group.add_argument("--jitter", type=float, default=0.1, help="Extra random latency, up to this many seconds")
+    stub_group.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    stub_group.add_argument("--overload-rate", type=float, default=0.0, help="Share of requests answered with 529")
+    stub_group.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that never answer")
+    stub_group.add_argument("--retry-after", type=float, default=0.5, help="retry-after seconds sent with 429s")
+    args = parser.parse_args()
+
+    calls = [call.strip() for call in args.calls.split(",") if call.strip()]
+    unknown = [call for call in calls if call not in CALLS]
+    if unknown:
+        parser.error(f"unknown calls: {', '.join(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    stub: Optional[ClaudeStubServer] = None
+    base_url = args.base_url or config.claude_base_url
+    api_key = config.claude_api_key
+    if args.stub:
+        stub = ClaudeStubServer(
+            latency=args.latency, jitter=args.jitter, rate_limit_rate=args.rate_limit_rate,
+            overload_rate=args.overload_rate, timeout_rate=args.timeout_rate, retry_after=args.retry_after
+        )
+        base_url = stub.start()
+        api_key = api_key or "stub-key"
+    elif not api_key:
+        print("Error: CLAUDE_API_KEY must be set in .env file, or use --stub")
+        return
+    print(f"Benchmarking {base_url} with {args.requests} requests per call and level")
+
+    rows = []
+    try:
+        for call in calls:
+            for level in levels:
+                service = ClaudeService(
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_concurrency=level,
+                    max_retries=args.max_retries,
+                    timeouts=dict.fromkeys(("checklist", "summary", "batch"), args.timeout) if args.timeout else None,
+                    preprocessor=EmailPreprocessor(config.claude_body_token_budget) if config.claude_preprocess else None
+                )
+                try:
+                    rows.append((call, level, run_level(service, call, sample_emails(args.requests), level)))
+                finally:
+                    service.close()
+    finally:
+        if stub:
+            stub.stop()
+
+    print(f"\n{'call':<10} {'conc':>5} {'reqs':>5} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+    for call, level, result in rows:
+        print(
+            f"{call:<10} {level:>5} {result['requests']:>5} {result['errors']:>6} "
+            f"{result['p50'] * 1000:>8.0f} {result['p95'] * 1000:>8.0f} {result['p99'] * 1000:>8.0f} "
+            f"{result['throughput']:>7.1f}"
+        )
+    if stub:
+        print(f"\nStub outcomes: {stub.stats()}")
+
+
+if __name__ == "__main__":
+    main()
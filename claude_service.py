@@ -3,116 +3,436 @@ Claude API service for generating checklist items from email content.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from typing import Optional, Dict, List
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, Optional, Dict, List, Tuple
 from config import config
+from email_preprocessor import EmailPreprocessor
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
 
 
 class ClaudeService:
-    """Service for interacting with the Claude API."""
+    """Service for interacting with the Claude API.
     
-    def __init__(self, api_key: str = None, model: str = None):
+    Requests go through one pooled ``requests.Session`` so repeated calls
+    reuse kept-alive connections instead of paying a TCP and TLS handshake
+    each time. ``base_url`` can point at a local stand-in endpoint.
+    
+    With a ``cache``, responses are stored under a hash of the model, the
+    prompt version and the normalized email content, so repeating a
+    request returns the stored answer without a network call.
+    
+    Bulk runs fan out over a thread pool capped at ``max_concurrency``.
+    Every call waits on a rate limiter synced from the response headers,
+    and 429/529/5xx responses and connection errors are retried with
+    jittered exponential backoff that honors ``retry-after``.
+    
+    The ``stream_*`` methods consume the Messages API event stream and
+    yield text as it is generated, so the GUI can show the first words
+    of an answer long before the whole completion is done.
+    
+    With a ``preprocessor``, email bodies are stripped of quoted history,
+    signatures and boilerplate and fitted to a token budget before they
+    are put in a prompt; otherwise the first 2000 characters are sent.
+    
+    Instructions go in a system block ahead of the per-email content, so
+    every call of a type sends the same prefix. They are not marked for
+    prompt caching: they are far shorter than the provider's minimum
+    cacheable prefix (1024 tokens or more), where the marker does nothing.
+    Token counts from every response, including prompt cache reads and
+    writes, are tallied in ``get_usage_stats()``.
+    """
+    
+    MESSAGES_PATH = "/v1/messages"
+    # Bump whenever a prompt template changes so old cached answers are not reused
+    PROMPT_VERSION = "3"
+    # Rough token estimate for packing batches
+    CHARS_PER_TOKEN = 4
+    # Output tokens allowed per generated checklist item, and per response
+    ITEM_TOKENS = 30
+    MAX_OUTPUT_TOKENS = 4096
+    # Rate limited, overloaded or transient server errors worth retrying
+    RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+    BASE_BACKOFF = 1.0
+    MAX_BACKOFF = 30.0
+    # Usage counters reported by the Messages API
+    USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+    
+    # Static instruction prefixes; the email being processed follows in the user message
+    CHECKLIST_INSTRUCTIONS = """Based on the email you are given, generate a single, actionable checklist item. The item should be:
+- Concise (under 80 characters)
+- Action-oriented (start with a verb)
+- Specific to the email content
+- Something that can be completed/checked off
+
+Please respond with ONLY the checklist item text, no additional explanation or formatting."""
+    
+    MULTIPLE_CHECKLIST_INSTRUCTIONS = """Based on the email you are given, generate {count} actionable checklist items. Each item should be:
+- Concise (under 80 characters each)
+- Action-oriented (start with a verb)
+- Specific to the email content
+- Something that can be completed/checked off
+
+Please respond with only the checklist items, one per line, no numbers or bullets, no additional explanation."""
+    
+    SUMMARY_INSTRUCTIONS = """Provide a brief 1-2 sentence summary of the main point or request of the email you are given.
+
+Please respond with ONLY the summary."""
+    
+    BATCH_INSTRUCTIONS = """For each email you are given, generate up to {items_per_email} actionable checklist items. Each item should be:
+- Concise (under 80 characters)
+- Action-oriented (start with a verb)
+- Specific to the email content
+- Something that can be completed/checked off
+Use an empty list for emails that need no action.
+
+Respond with ONLY a JSON object mapping each email id to its list of items, for example:
+{{"12": ["Reply to Sam about the budget"], "15": []}}"""
+    
+    def __init__(self, api_key: str = None, model: str = None, base_url: str = None,
+                 pool_size: int = None, connect_timeout: float = None,
+                 timeouts: Optional[Dict[str, float]] = None, cache: Optional[ResponseCache] = None,
+                 batch_token_budget: int = None, max_concurrency: int = None, max_retries: int = None,
+                 preprocessor: Optional[EmailPreprocessor] = None):
         self.api_key = api_key or config.claude_api_key
         self.model = model or config.claude_model
-        self.base_url = "https://api.anthropic.com/v1/messages"
+        self.base_url = (base_url or config.claude_base_url).rstrip("/") + self.MESSAGES_PATH
+        self.connect_timeout = connect_timeout or config.claude_connect_timeout
+        # Read timeouts per call type
+        self.timeouts = timeouts or {
+            "checklist": config.claude_checklist_timeout,
+            "summary": config.claude_summary_timeout,
+            "batch": config.claude_batch_timeout
+        }
+        self.cache = cache
+        self.preprocessor = preprocessor
+        self.batch_token_budget = batch_token_budget or config.claude_batch_token_budget
+        self.max_concurrency = max(1, max_concurrency or config.claude_max_concurrency)
+        self.max_retries = config.claude_max_retries if max_retries is None else max_retries
+        self.rate_limiter = RateLimiter()
+        self._usage = dict.fromkeys(self.USAGE_FIELDS, 0)
+        self._usage_lock = threading.Lock()
+        # Caps in-flight requests, including ones made directly from the GUI thread
+        self._concurrency = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="claude")
         
         if not self.api_key:
             raise ValueError("Claude API key is required. Set CLAUDE_API_KEY in your .env file.")
-    
-    def _make_request(self, messages: List[Dict], max_tokens: int = 1000) -> Optional[str]:
-        """Make a request to the Claude API."""
-        headers = {
+        
+        # Keep at least one pooled connection per concurrent request
+        pool_size = max(pool_size or config.claude_pool_size, self.max_concurrency)
+        self.session = requests.Session()
+        self.session.headers.update({
             "Content-Type": "application/json",
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01"
-        }
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def close(self) -> None:
+        """Close the pooled connections and the response cache, reporting its hit rate and token savings."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+        if self.cache:
+            stats = self.cache.stats()
+            print(
+                f"Claude response cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate)"
+            )
+            self.cache.close()
+        usage = self.get_usage_stats()
+        if usage["input_tokens"] or usage["cache_read_input_tokens"]:
+            print(
+                f"Claude tokens: {usage['input_tokens']} input, {usage['output_tokens']} output; "
+                f"prompt cache: {usage['cache_read_input_tokens']} read, "
+                f"{usage['cache_creation_input_tokens']} written"
+            )
+        if self.preprocessor:
+            stats = self.preprocessor.stats()
+            print(
+                f"Email preprocessing: {stats['original_tokens']} -> {stats['tokens']} estimated body tokens "
+                f"over {stats['messages']} messages ({stats['saved_ratio']:.0%} saved)"
+            )
+    
+    def get_cache_stats(self) -> Optional[Dict[str, float]]:
+        """Get the response cache's hits, misses and hit rate, if caching is enabled."""
+        return self.cache.stats() if self.cache else None
+    
+    def get_usage_stats(self) -> Dict[str, int]:
+        """Get the token usage reported so far, including prompt cache reads and writes."""
+        with self._usage_lock:
+            return dict(self._usage)
+    
+    def _record_usage(self, usage: Dict) -> None:
+        """Add a response's usage block to the running totals."""
+        with self._usage_lock:
+            for field in self.USAGE_FIELDS:
+                self._usage[field] += usage.get(field) or 0
+    
+    @staticmethod
+    def _system_blocks(instructions: str) -> List[Dict]:
+        """Instructions as a system block."""
+        return [{"type": "text", "text": instructions}]
+    
+    @staticmethod
+    def _email_prompt(email_subject: str, email_body: str, email_sender: str) -> List[Dict]:
+        """The user message carrying one email."""
+        content = f"""Email Subject: {email_subject}
+From: {email_sender}
+
+Email Content:
+{email_body}"""
+        return [{"role": "user", "content": content}]
+    
+    def _cache_key(self, call_type: str, email_subject: str, email_body: str, email_sender: str,
+                   *extra: str) -> str:
+        """Key a request by model, prompt version and whitespace-normalized, prepared email content."""
+        content = [" ".join((text or "").split()) for text in (email_subject, email_sender, email_body)]
+        return ResponseCache.make_key(self.model, self.PROMPT_VERSION, call_type, *extra, *content)
+    
+    def _prepare_body(self, email_body: str) -> str:
+        """The part of an email body to put in a prompt."""
+        if self.preprocessor:
+            return self.preprocessor.prepare(email_body).text
+        return (email_body or "")[:2000]
+    
+    def _make_request(self, messages: List[Dict], max_tokens: int = 1000,
+                      call_type: str = "checklist", cache_key: Optional[str] = None,
+                      system: Optional[str] = None) -> Optional[str]:
+        """Make a request to the Claude API, answering from the cache when possible."""
+        if self.cache and cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         payload = {
             "model": self.model,
             "max_tokens": max_tokens,
             "messages": messages
         }
+        if system:
+            payload["system"] = self._system_blocks(system)
+        estimated_tokens = self._estimate_tokens((system or "") + json.dumps(messages))
         
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                with self._concurrency:
+                    response = self.session.post(
+                        self.base_url,
+                        json=payload,
+                        timeout=(self.connect_timeout, self.timeouts.get(call_type, 30))
+                    )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    print(f"Error making Claude API request: {e}")
+                    return None
+                self._wait_before_retry(attempt, None, str(e))
+                continue
+            
+            self.rate_limiter.update(response.headers)
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                self._wait_before_retry(
+                    attempt, response.headers.get("retry-after"), f"HTTP {response.status_code}"
+                )
+                continue
+            
+            try:
+                response.raise_for_status()
+                
+                result = response.json()
+                self._record_usage(result.get("usage", {}))
+                text = result.get("content", [{}])[0].get("text", "")
+                if self.cache and cache_key and text:
+                    self.cache.put(cache_key, text)
+                return text
+                
+            except requests.exceptions.RequestException as e:
+                print(f"Error making Claude API request: {e}")
+                return None
+            except (KeyError, IndexError, json.JSONDecodeError) as e:
+                print(f"Error parsing Claude API response: {e}")
+                return None
+        return None
+    
+    def _wait_before_retry(self, attempt: int, retry_after: Optional[str], reason: str) -> None:
+        """Sleep for the server's retry-after, or a jittered exponential backoff."""
         try:
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            response.raise_for_status()
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            # Full jitter keeps concurrent workers from retrying in lockstep
+            delay = random.uniform(0, min(self.MAX_BACKOFF, self.BASE_BACKOFF * 2 ** attempt))
+        print(f"Claude API request failed ({reason}); retrying in {delay:.1f}s")
+        time.sleep(delay)
+    
+    def _stream_request(self, messages: List[Dict], max_tokens: int = 1000,
+                        call_type: str = "checklist", cache_key: Optional[str] = None,
+                        system: Optional[str] = None) -> Iterator[str]:
+        """Stream a request's text deltas as they arrive, answering from the cache when possible.
+        
+        Failures before the stream starts are retried like ``_make_request``;
+        a failure mid-stream is raised to the consumer. The full text is
+        cached once the stream completes.
+        """
+        if self.cache and cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": messages,
+            "stream": True
+        }
+        if system:
+            payload["system"] = self._system_blocks(system)
+        parts = []
+        usage: Dict[str, int] = {}
+        # The slot is held until the stream is drained or abandoned
+        with self._concurrency:
+            response = self._open_stream(payload, call_type)
+            if response is None:
+                return
+            with response:
+                try:
+                    for text in self._iter_text_deltas(response, usage):
+                        parts.append(text)
+                        yield text
+                except requests.exceptions.RequestException as e:
+                    # Re-raised so the partial text is not taken for a complete answer
+                    print(f"Error reading Claude API stream: {e}")
+                    raise
+                except (KeyError, ValueError) as e:
+                    print(f"Error parsing Claude API stream: {e}")
+                    raise
+                finally:
+                    self._record_usage(usage)
+        
+        text = "".join(parts)
+        if self.cache and cache_key and text:
+            self.cache.put(cache_key, text)
+    
+    def _open_stream(self, payload: Dict, call_type: str) -> Optional[requests.Response]:
+        """Start a streaming request, retrying until the server accepts it."""
+        estimated_tokens = self._estimate_tokens(json.dumps(payload.get("system", "")) + json.dumps(payload["messages"]))
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                response = self.session.post(
+                    self.base_url,
+                    json=payload,
+                    stream=True,
+                    # The read timeout applies between chunks, not to the whole stream
+                    timeout=(self.connect_timeout, self.timeouts.get(call_type, 30))
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    print(f"Error making Claude API request: {e}")
+                    return None
+                self._wait_before_retry(attempt, None, str(e))
+                continue
             
-            result = response.json()
-            return result.get("content", [{}])[0].get("text", "")
+            self.rate_limiter.update(response.headers)
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                response.close()
+                self._wait_before_retry(
+                    attempt, response.headers.get("retry-after"), f"HTTP {response.status_code}"
+                )
+                continue
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error making Claude API request: {e}")
-            return None
-        except (KeyError, IndexError, json.JSONDecodeError) as e:
-            print(f"Error parsing Claude API response: {e}")
-            return None
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                response.close()
+                print(f"Error making Claude API request: {e}")
+                return None
+            return response
+        return None
+    
+    @staticmethod
+    def _iter_text_deltas(response: requests.Response, usage: Dict[str, int]) -> Iterator[str]:
+        """Yield the text deltas from a Messages API server-sent event stream, filling in ``usage``."""
+        # Event streams often omit the charset, which requests would take as Latin-1
+        response.encoding = "utf-8"
+        data_lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line or not data_lines:
+                # "event:" lines repeat the type already in the data
+                continue
+            
+            # A blank line ends the event
+            event = json.loads("\n".join(data_lines))
+            data_lines = []
+            if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                yield event["delta"]["text"]
+            elif event.get("type") == "message_start":
+                usage.update(event["message"].get("usage", {}))
+            elif event.get("type") == "message_delta":
+                # Carries the final output token count
+                usage.update(event.get("usage", {}))
+            elif event.get("type") == "message_stop":
+                return
+            elif event.get("type") == "error":
+                raise ValueError(event.get("error", {}).get("message", "stream error"))
+        raise ValueError("Stream ended before message_stop.")
     
     def generate_checklist_item(self, email_subject: str, email_body: str, email_sender: str = "") -> Optional[str]:
         """Generate a checklist item based on email content."""
         
-        # Create a focused prompt for checklist generation
-        prompt = f"""Based on the following email, generate a single, actionable checklist item. The item should be:
-- Concise (under 80 characters)
-- Action-oriented (start with a verb)
-- Specific to the email content
-- Something that can be completed/checked off
-
-Email Subject: {email_subject}
-From: {email_sender}
-
-Email Content:
-{email_body[:2000]}  # Limit content to avoid token limits
-
-Please respond with ONLY the checklist item text, no additional explanation or formatting."""
-
-        messages = [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+        email_body = self._prepare_body(email_body)
         
-        response = self._make_request(messages, max_tokens=150)
+        response = self._make_request(
+            self._email_prompt(email_subject, email_body, email_sender),
+            max_tokens=150,
+            system=self.CHECKLIST_INSTRUCTIONS,
+            cache_key=self._cache_key("checklist", email_subject, email_body, email_sender)
+        )
         if response:
-            # Clean up the response - remove any extra whitespace or formatting
-            cleaned_response = response.strip().strip('"').strip("'")
-            # Ensure it's not too long for a checklist item
-            if len(cleaned_response) > 100:
-                cleaned_response = cleaned_response[:97] + "..."
-            return cleaned_response
+            return self.clean_checklist_item(response)
         
         return None
     
+    def stream_checklist_item(self, email_subject: str, email_body: str, email_sender: str = "") -> Iterator[str]:
+        """Stream a checklist item's text as it is generated; pass the joined text to clean_checklist_item."""
+        email_body = self._prepare_body(email_body)
+        return self._stream_request(
+            self._email_prompt(email_subject, email_body, email_sender),
+            max_tokens=150,
+            system=self.CHECKLIST_INSTRUCTIONS,
+            cache_key=self._cache_key("checklist", email_subject, email_body, email_sender)
+        )
+    
+    @staticmethod
+    def clean_checklist_item(response: str) -> str:
+        """Strip quotes and whitespace from a generated item and cap its length."""
+        cleaned_response = response.strip().strip('"').strip("'")
+        # Ensure it's not too long for a checklist item
+        if len(cleaned_response) > 100:
+            cleaned_response = cleaned_response[:97] + "..."
+        return cleaned_response
+    
     def generate_multiple_checklist_items(self, email_subject: str, email_body: str, email_sender: str = "", count: int = 3) -> List[str]:
         """Generate multiple checklist items based on email content."""
         
-        prompt = f"""Based on the following email, generate {count} actionable checklist items. Each item should be:
-- Concise (under 80 characters each)
-- Action-oriented (start with a verb)
-- Specific to the email content
-- Something that can be completed/checked off
-
-Email Subject: {email_subject}
-From: {email_sender}
-
-Email Content:
-{email_body[:2000]}
-
-Please respond with only the checklist items, one per line, no numbers or bullets, no additional explanation."""
-
-        messages = [
-            {
-                "role": "user", 
-                "content": prompt
-            }
-        ]
-        
-        response = self._make_request(messages, max_tokens=300)
+        email_body = self._prepare_body(email_body)
+        response = self._make_request(
+            self._email_prompt(email_subject, email_body, email_sender),
+            max_tokens=300,
+            system=self.MULTIPLE_CHECKLIST_INSTRUCTIONS.format(count=count),
+            cache_key=self._cache_key("checklist_multiple", email_subject, email_body, email_sender, str(count))
+        )
         if response:
             # Split response into individual items and clean them up
             items = []
@@ -130,33 +450,174 @@ Please respond with only the checklist items, one per line, no numbers or bullet
     def summarize_email(self, email_subject: str, email_body: str, email_sender: str = "") -> Optional[str]:
         """Generate a brief summary of the email."""
         
-        prompt = f"""Provide a brief 1-2 sentence summary of this email's main point or request:
-
-Email Subject: {email_subject}
-From: {email_sender}
-
-Email Content:
-{email_body[:2000]}
-
-Summary:"""
-
-        messages = [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+        email_body = self._prepare_body(email_body)
         
-        response = self._make_request(messages, max_tokens=200)
+        response = self._make_request(
+            self._email_prompt(email_subject, email_body, email_sender),
+            max_tokens=200,
+            system=self.SUMMARY_INSTRUCTIONS,
+            call_type="summary",
+            cache_key=self._cache_key("summary", email_subject, email_body, email_sender)
+        )
         if response:
             return response.strip()
         
         return None
     
+    def stream_summary(self, email_subject: str, email_body: str, email_sender: str = "") -> Iterator[str]:
+        """Stream an email summary's text as it is generated."""
+        email_body = self._prepare_body(email_body)
+        return self._stream_request(
+            self._email_prompt(email_subject, email_body, email_sender),
+            max_tokens=200,
+            system=self.SUMMARY_INSTRUCTIONS,
+            call_type="summary",
+            cache_key=self._cache_key("summary", email_subject, email_body, email_sender)
+        )
+    
+    def generate_checklist_batch(self, emails: List[Dict[str, str]], items_per_email: int = 3,
+                                 on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, List[str]]:
+        """Generate checklist items for many emails with as few, concurrent requests as possible.
+
+        ``emails`` are dicts with ``id``, ``subject``, ``sender`` and ``body``.
+        They are packed into requests that fit ``batch_token_budget``, and
+        each request returns one JSON object keyed by id, so the
+        instructions are sent once per batch instead of once per email.
+        Returns the items for each id; emails with nothing actionable map
+        to an empty list. Emails whose request failed, or that the answer
+        left out, are missing from the result and are not cached.
+        ``on_progress(done, total)`` is called per batch.
+        """
+        results: Dict[str, List[str]] = {}
+        pending = []
+        for email in emails:
+            email = dict(email, body=self._prepare_body(email["body"]))
+            key = self._cache_key(
+                "checklist_batch", email["subject"], email["body"], email["sender"], str(items_per_email)
+            )
+            cached = self.cache.get(key) if self.cache else None
+            if cached is not None:
+                results[email["id"]] = json.loads(cached)
+            else:
+                pending.append((email, key))
+
+        done = len(results)
+        futures = {
+            self._executor.submit(
+                self._request_checklist_batch, [email for email, _ in batch], items_per_email
+            ): batch
+            for batch in self._pack_batches(pending, items_per_email)
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            items = future.result() or {}
+            for email, key in batch:
+                if email["id"] not in items:
+                    continue
+                results[email["id"]] = items[email["id"]]
+                if self.cache:
+                    self.cache.put(key, json.dumps(items[email["id"]]))
+            done += len(batch)
+            if on_progress:
+                on_progress(done, len(emails))
+        return results
+    
+    def summarize_emails(self, emails: List[Dict[str, str]],
+                         on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Optional[str]]:
+        """Summarize many emails concurrently; returns summaries keyed by email id.
+
+        ``emails`` use the same dicts as generate_checklist_batch.
+        """
+        futures = {
+            self._executor.submit(self.summarize_email, email["subject"], email["body"], email["sender"]): email["id"]
+            for email in emails
+        }
+        summaries = {}
+        for done, future in enumerate(as_completed(futures), 1):
+            summaries[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(emails))
+        return summaries
+    
+    def _pack_batches(self, pending: List[Tuple[Dict[str, str], str]],
+                      items_per_email: int) -> List[List[Tuple[Dict[str, str], str]]]:
+        """Group emails greedily so each request stays within the input and output budgets."""
+        overhead = self._estimate_tokens(self.BATCH_INSTRUCTIONS.format(items_per_email=items_per_email))
+        max_emails = max(1, (self.MAX_OUTPUT_TOKENS - 100) // (self.ITEM_TOKENS * items_per_email))
+        batches, current, used = [], [], overhead
+        for entry in pending:
+            tokens = self._estimate_tokens(self._format_batch_email(entry[0]))
+            if current and (used + tokens > self.batch_token_budget or len(current) >= max_emails):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(entry)
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _request_checklist_batch(self, emails: List[Dict[str, str]],
+                                 items_per_email: int) -> Optional[Dict[str, List[str]]]:
+        """Send one batch and parse its JSON object of items per email id; None if the request failed."""
+        max_tokens = min(self.MAX_OUTPUT_TOKENS, 100 + self.ITEM_TOKENS * items_per_email * len(emails))
+        response = self._make_request(
+            [{"role": "user", "content": "\n\n".join(self._format_batch_email(email) for email in emails)}],
+            max_tokens=max_tokens,
+            call_type="batch",
+            system=self.BATCH_INSTRUCTIONS.format(items_per_email=items_per_email)
+        )
+        if not response:
+            return None
+
+        try:
+            # Tolerate prose or code fences around the JSON object
+            data = json.loads(response[response.index("{"):response.rindex("}") + 1])
+        except ValueError as e:
+            print(f"Error parsing batch checklist response: {e}")
+            return None
+        if not isinstance(data, dict):
+            print("Error parsing batch checklist response: not a JSON object")
+            return None
+
+        results = {}
+        for email_id, items in data.items():
+            if not isinstance(items, list):
+                continue
+            cleaned = []
+            for item in items:
+                item = str(item).strip().strip('"').strip("'").strip()
+                if len(item) > 5:
+                    cleaned.append(item[:97] + "..." if len(item) > 100 else item)
+            results[str(email_id)] = cleaned[:items_per_email]
+        return results
+    
+    @staticmethod
+    def _format_batch_email(email: Dict[str, str]) -> str:
+        """Render one email for a batch prompt."""
+        return (
+            f'<email id="{email["id"]}">\n'
+            f'Subject: {email["subject"]}\n'
+            f'From: {email["sender"]}\n\n'
+            f'{email["body"]}\n'
+            f'</email>'
+        )
+    
+    @classmethod
+    def _estimate_tokens(cls, text: str) -> int:
+        """Estimate a text's token count from its length."""
+        return len(text) // cls.CHARS_PER_TOKEN + 1
+    
     def is_available(self) -> bool:
         """Check if the Claude API is available and configured."""
         return bool(self.api_key)
 
 
 # Global instance for easy access
-claude_service = ClaudeService() if config.claude_api_key else None
\ No newline at end of file
+claude_service = ClaudeService(
+    cache=ResponseCache(
+        config.claude_cache_file,
+        ttl=config.claude_cache_ttl,
+        max_entries=config.claude_cache_max_entries
+    ) if config.claude_cache else None,
+    preprocessor=EmailPreprocessor(config.claude_body_token_budget) if config.claude_preprocess else None
+) if config.claude_api_key else None
\ No newline at end of file
@@ -0,0 +1,280 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class ClaudeStubServer:
+    """Local stand-in for the Anthropic ``/v1/messages`` endpoint.
+
+    Answers with canned text shaped like the real API, as a JSON body or
+    as a server-sent event stream when the request sets ``"stream"``.
+    Every response waits ``latency`` seconds (plus up to ``jitter``), and
+    streams also wait ``token_delay`` between text deltas. A share of
+    requests can be failed with 429 (with ``retry-after``), 529 or a hang
+    longer than the client's read timeout, so retry and backoff paths can
+    be exercised. Requests the client hangs up on before the response is
+    complete are counted as ``client_abort``. Point ``CLAUDE_BASE_URL``
+    at ``base_url`` to use it.
+    """
+
+    MESSAGES_PATH = "/v1/messages"
+    CHARS_PER_TOKEN = 4
+    CHECKLIST_ITEM = "Reply to the sender with the requested details"
+    SUMMARY = "The sender asks for a reply with the requested details by the end of the week."
+
+    _EMAIL_ID = re.compile(r'<email id="([^"]*)">')
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2, jitter: float = 0.0,
+                 token_delay: float = 0.02, rate_limit_rate: float = 0.0, overload_rate: float = 0.0,
+                 timeout_rate: float = 0.0, hang_seconds: float = 120.0, retry_after: float = 1.0,
+                 requests_per_minute: int = 0, text: Optional[str] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.rate_limit_rate = rate_limit_rate
+        self.overload_rate = overload_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.retry_after = retry_after
+        self.requests_per_minute = requests_per_minute
+        self.text = text
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        stub = self
+
+        class Handler(_MessagesHandler):
+            server_stub = stub
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Serve from a background thread and return the base URL."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        self.httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        """Get how many requests ended in each outcome."""
+        with self._lock:
+            return dict(self.counts)
+
+    def count(self, outcome: str) -> None:
+        """Tally one request's outcome."""
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def pick_outcome(self) -> str:
+        """Decide whether a request succeeds or which failure it gets."""
+        roll = random.random()
+        for outcome, rate in (("429", self.rate_limit_rate), ("529", self.overload_rate),
+                              ("timeout", self.timeout_rate)):
+            if roll < rate:
+                return outcome
+            roll -= rate
+        return "200"
+
+    def response_text(self, payload: Dict) -> str:
+        """Canned output matching the kind of prompt that was sent."""
+        if self.text is not None:
+            return self.text
+
+        system = " ".join(block.get("text", "") for block in payload.get("system") or [])
+        content = payload.get("messages", [{}])[-1].get("content", "")
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content)
+        # Instructions live in the system block; older prompts inline them with the email
+        instructions = system or content
+
+        email_ids = self._EMAIL_ID.findall(content)
+        if email_ids:
+            return json.dumps({email_id: [self.CHECKLIST_ITEM] for email_id in email_ids})
+        match = re.search(r"generate (\d+) actionable checklist items", instructions)
+        if match:
+            return "\n".join(f"{self.CHECKLIST_ITEM} ({n})" for n in range(1, int(match.group(1)) + 1))
+        if "summary" in instructions.lower():
+            return self.SUMMARY
+        return self.CHECKLIST_ITEM
+
+    def usage(self, payload: Dict, text: str) -> Dict[str, int]:
+        """Estimated token usage for a request and its answer."""
+        return {
+            "input_tokens": len(
+                json.dumps(payload.get("system", "")) + json.dumps(payload.get("messages", []))
+            ) // self.CHARS_PER_TOKEN + 1,
+            "output_tokens": len(text) // self.CHARS_PER_TOKEN + 1,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0
+        }
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        """Rate-limit headers like the real API sends, if a limit is configured."""
+        if not self.requests_per_minute:
+            return {}
+        return {
+            "anthropic-ratelimit-requests-limit": str(self.requests_per_minute),
+            "anthropic-ratelimit-requests-remaining": str(self.requests_per_minute)
+        }
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_stub: ClaudeStubServer = None
+
+    def do_POST(self):
+        stub = self.server_stub
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self._send_json(400, {"type": "error", "error": {"type": "invalid_request_error",
+                                                             "message": "Body is not JSON"}})
+            return
+        if self.path.split("?")[0] != stub.MESSAGES_PATH:
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+            return
+
+        time.sleep(stub.latency + random.uniform(0, stub.jitter))
+        outcome = stub.pick_outcome()
+        if outcome == "timeout":
+            # Say nothing until the client gives up
+            stub.count(outcome)
+            time.sleep(stub.hang_seconds)
+            self.close_connection = True
+            return
+
+        try:
+            if outcome == "429":
+                self._send_json(429, {"type": "error", "error": {"type": "rate_limit_error",
+                                                                 "message": "Stub rate limit"}},
+                                {"retry-after": str(stub.retry_after)})
+            elif outcome == "529":
+                self._send_json(529, {"type": "error", "error": {"type": "overloaded_error",
+                                                                 "message": "Stub overloaded"}})
+            else:
+                self._send_answer(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up, e.g. the app closing a superseded stream
+            stub.count("client_abort")
+            self.close_connection = True
+            return
+        stub.count(outcome)
+
+    def _send_answer(self, payload: Dict):
+        text = self.server_stub.response_text(payload)
+        usage = self.server_stub.usage(payload, text)
+        if payload.get("stream"):
+            self._send_stream(payload, text, usage)
+        else:
+            self._send_json(200, {
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "model": payload.get("model", ""),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": usage
+            })
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in {**self.server_stub.rate_limit_headers(), **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, payload: Dict, text: str, usage: Dict[str, int]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in self.server_stub.rate_limit_headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        self._send_event("message_start", {
+            "type": "message_start",
+            "message": {"id": "msg_stub", "type": "message", "role": "assistant",
+                        "model": payload.get("model", ""), "content": [],
+                        "usage": dict(usage, output_tokens=1)}
+        })
+        self._send_event("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}
+        })
+        for word in re.findall(r"\S+\s*", text):
+            time.sleep(self.server_stub.token_delay)
+            self._send_event("content_block_delta", {
+                "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": word}
+            })
+        self._send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._send_event("message_delta", {
+            "type": "message_delta", "delta": {"stop_reason": "end_turn"},
+            "usage": {"output_tokens": usage["output_tokens"]}
+        })
+        self._send_event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_event(self, event: str, data: Dict):
+        chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Run the stub server in the foreground."""
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Claude Messages API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each response (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed deltas")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--overload-rate", type=float, default=0.0, help="Share of requests answered with 529")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that never answer")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests-per-minute limit to advertise in headers")
+    parser.add_argument("--text", help="Answer every request with this text")
+    args = parser.parse_args()
+
+    stub = ClaudeStubServer(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, token_delay=args.token_delay,
+        rate_limit_rate=args.rate_limit_rate, overload_rate=args.overload_rate, timeout_rate=args.timeout_rate,
+        retry_after=args.retry_after, requests_per_minute=args.rpm, text=args.text
+    )
+    print(f"Serving stub Claude API at {stub.base_url} (set CLAUDE_BASE_URL to this)")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+        print(f"Outcomes: {stub.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,10 +19,127 @@ class Config:
     def imap_server(self):
         return os.getenv("IMAP_SERVER", "imap.mail.yahoo.com")
     
+    @property
+    def fetch_batch_size(self):
+        return int(os.getenv("FETCH_BATCH_SIZE", "500"))
+    
+    @property
+    def headers_only(self):
+        return os.getenv("HEADERS_ONLY", "true").lower() in ("1", "true", "yes")
+    
+    @property
+    def body_max_bytes(self):
+        return int(os.getenv("BODY_MAX_BYTES", "0"))
+    
     @property
     def blocked_emails_file(self):
         return os.getenv("BLOCKED_EMAILS_FILE", "blocked_emails.json")
     
+    @property
+    def blocklist_compact_threshold(self):
+        return int(os.getenv("BLOCKLIST_COMPACT_THRESHOLD", "1000"))
+    
+    @property
+    def shared_blocklist_files(self):
+        files = os.getenv("SHARED_BLOCKLIST_FILES", "")
+        return [path.strip() for path in files.split(",") if path.strip()]
+    
+    @property
+    def imap_pool_size(self):
+        return int(os.getenv("IMAP_POOL_SIZE", "3"))
+    
+    @property
+    def imap_keepalive_interval(self):
+        return int(os.getenv("IMAP_KEEPALIVE_INTERVAL", "300"))
+    
+    @property
+    def server_side_blocking(self):
+        return os.getenv("SERVER_SIDE_BLOCKING", "true").lower() in ("1", "true", "yes")
+    
+    @property
+    def search_max_length(self):
+        return int(os.getenv("SEARCH_MAX_LENGTH", "4000"))
+    
+    @property
+    def search_max_exclusions(self):
+        return int(os.getenv("SEARCH_MAX_EXCLUSIONS", "8"))
+    
+    @property
+    def push_mode(self):
+        return os.getenv("PUSH_MODE", "false").lower() in ("1", "true", "yes")
+    
+    @property
+    def idle_timeout(self):
+        return int(os.getenv("IDLE_TIMEOUT", str(29 * 60)))
+    
+    @property
+    def purge_action(self):
+        return os.getenv("PURGE_ACTION", "move").lower()
+    
+    @property
+    def junk_folder(self):
+        return os.getenv("JUNK_FOLDER", "")
+    
+    @property
+    def spam_filter(self):
+        return os.getenv("SPAM_FILTER", "true").lower() in ("1", "true", "yes")
+    
+    @property
+    def spam_score_threshold(self):
+        return float(os.getenv("SPAM_SCORE_THRESHOLD", "0.95"))
+    
+    @property
+    def data_dir(self):
+        return os.getenv("DATA_DIR", os.path.join(os.path.expanduser("~"), ".email_checklist"))
+    
+    @property
+    def message_store_file(self):
+        return os.getenv("MESSAGE_STORE_FILE", os.path.join(self.data_dir, "messages.db"))
+    
+    @property
+    def spam_model_file(self):
+        return os.getenv("SPAM_MODEL_FILE", os.path.join(self.data_dir, "spam_model.npz"))
+    
+    @property
+    def claude_batch_timeout(self):
+        return float(os.getenv("CLAUDE_BATCH_TIMEOUT", "90"))
+    
+    @property
+    def claude_batch_token_budget(self):
+        return int(os.getenv("CLAUDE_BATCH_TOKEN_BUDGET", "8000"))
+    
+    @property
+    def claude_max_concurrency(self):
+        return int(os.getenv("CLAUDE_MAX_CONCURRENCY", "4"))
+    
+    @property
+    def claude_max_retries(self):
+        return int(os.getenv("CLAUDE_MAX_RETRIES", "4"))
+    
+    @property
+    def claude_cache(self):
+        return os.getenv("CLAUDE_CACHE", "true").lower() in ("1", "true", "yes")
+    
+    @property
+    def claude_cache_file(self):
+        return os.getenv("CLAUDE_CACHE_FILE", os.path.join(self.data_dir, "claude_cache.db"))
+    
+    @property
+    def claude_cache_ttl(self):
+        return int(os.getenv("CLAUDE_CACHE_TTL", str(7 * 24 * 3600)))
+    
+    @property
+    def claude_cache_max_entries(self):
+        return int(os.getenv("CLAUDE_CACHE_MAX_ENTRIES", "2000"))
+    
+    @property
+    def claude_preprocess(self):
+        return os.getenv("CLAUDE_PREPROCESS", "true").lower() in ("1", "true", "yes")
+    
+    @property
+    def claude_body_token_budget(self):
+        return int(os.getenv("CLAUDE_BODY_TOKEN_BUDGET", "500"))
+    
     @property
     def window_width(self):
         return int(os.getenv("WINDOW_WIDTH", "700"))
@@ -38,6 +155,26 @@ class Config:
     @property
     def claude_model(self):
         return os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
+    
+    @property
+    def claude_base_url(self):
+        return os.getenv("CLAUDE_BASE_URL", "https://api.anthropic.com")
+    
+    @property
+    def claude_pool_size(self):
+        return int(os.getenv("CLAUDE_POOL_SIZE", "4"))
+    
+    @property
+    def claude_connect_timeout(self):
+        return float(os.getenv("CLAUDE_CONNECT_TIMEOUT", "5"))
+    
+    @property
+    def claude_checklist_timeout(self):
+        return float(os.getenv("CLAUDE_CHECKLIST_TIMEOUT", "30"))
+    
+    @property
+    def claude_summary_timeout(self):
+        return float(os.getenv("CLAUDE_SUMMARY_TIMEOUT", "30"))
 
 # Global config instance
 config = Config()
\ No newline at end of file
@@ -0,0 +1,274 @@
+import argparse
+import email
+import email.policy
+import re
+import threading
+from typing import Dict, List, NamedTuple
+from urllib.parse import urlsplit
+
+
+class PreparedBody(NamedTuple):
+    """A cleaned email body and its estimated token counts before and after."""
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+class EmailPreprocessor:
+    """Shrinks email bodies to the part worth sending in a prompt.
+
+    Cleaning drops quoted reply history, signatures, trailing legal and
+    marketing boilerplate, swaps long tracking URLs for their host name and
+    collapses whitespace. A forwarded message under a short note is kept.
+    If the result still exceeds ``max_tokens``, the paragraphs that look
+    most like a request (questions, asks, dates) are kept in their
+    original order and the rest are elided.
+
+    Token counts are estimated from text length, like ClaudeService does.
+    Totals across all prepared messages are available from ``stats()``.
+    """
+
+    CHARS_PER_TOKEN = 4
+    # URLs longer than this are replaced by their host
+    MAX_URL_CHARS = 40
+    ELISION = "[...]"
+
+    # Everything from a reply header onwards is quoted history
+    _REPLY_HEADER = re.compile(
+        r"^(?:(?P<wrote>On\b[^\n]{0,200}(?:\n[^\n]{0,200})?\bwrote:[ \t]*$)"
+        r"|-{2,}[ \t]*Original Message[ \t]*-{2,}"
+        r"|_{10,}[ \t]*\nFrom:"
+        r"|From:[^\n]*\n(?:[^\n]*\n){0,3}?(?:Sent|Date):)",
+        re.MULTILINE | re.IGNORECASE
+    )
+    # A header block's Subject line, used to tell replies from forwards
+    _HEADER_SUBJECT = re.compile(r"^Subject:[ \t]*(?P<reply>(?:re|aw|sv)[ \t]*:)?", re.MULTILINE | re.IGNORECASE)
+    HEADER_BLOCK_LINES = 8
+    # A forward is kept when the note above its header is at most this long
+    FORWARD_NOTE_CHARS = 200
+    _QUOTED_LINE = re.compile(r"^[ \t]*>.*\n?", re.MULTILINE)
+    # The standard "-- " delimiter; a bare "--" is too often a separator inside the text
+    _SIGNATURE = re.compile(r"^-- $", re.MULTILINE)
+    _SIGN_OFF = re.compile(
+        r"^[ \t]*(?:(?:best|kind|warm|many)?[ \t]*regards|thanks(?: again)?|thank you|cheers|sincerely|best)"
+        r"[ \t]*,?[ \t]*$",
+        re.MULTILINE | re.IGNORECASE
+    )
+    _SENT_FROM = re.compile(r"^[ \t]*Sent from my [^\n]*$", re.MULTILINE | re.IGNORECASE)
+    # Sign-offs only end the message when at most this many short name or title lines follow
+    SIGN_OFF_TAIL_LINES = 8
+    SIGN_OFF_LINE_CHARS = 60
+    # Only trailing paragraphs made up mostly of disclaimer or mailing-list wording are dropped
+    _BOILERPLATE = re.compile(
+        r"\b(?:intended (?:solely )?for the (?:use of the )?(?:individual|addressee|named recipient)"
+        r"|intended recipient|confidential(?:ity)? (?:notice|information)|privileged and confidential"
+        r"|unsubscribe|privacy policy|manage (?:your )?(?:e-?mail )?preferences|all rights reserved"
+        r"|view (?:this (?:e-?mail )?)?in (?:your|a) browser|please do not reply to this)\b",
+        re.IGNORECASE
+    )
+    _SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+    _URL = re.compile(r"\bhttps?://[^\s<>\"')\]]+|\bwww\.[^\s<>\"')\]]+", re.IGNORECASE)
+    # Zero-width and padding characters used in marketing preheaders
+    _INVISIBLE = re.compile("[\u200b-\u200d\u2060\ufeff\u034f\u00ad]")
+    _SPACES = re.compile(r"[ \t\u00a0]+")
+    _BLANK_LINES = re.compile(r"\n{3,}")
+    _PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+    # Cues that a paragraph asks for something
+    _REQUEST_CUE = re.compile(
+        r"\b(?:please|could you|can you|would you|need(?:s|ed)? to|let me know|deadline|due|asap|urgent"
+        r"|required|reminder|confirm|review|approve|sign|submit|send|schedule|meeting|call|rsvp|action)\b",
+        re.IGNORECASE
+    )
+    _DATE_CUE = re.compile(
+        r"\b(?:today|tonight|tomorrow|eod|eow|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+        r"|next week|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\b|\b\d{1,2}[:/.]\d{1,2}\b",
+        re.IGNORECASE
+    )
+
+    def __init__(self, max_tokens: int = 500):
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.original_tokens = 0
+        self.tokens = 0
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        """Estimate a text's token count from its length."""
+        return len(text) // cls.CHARS_PER_TOKEN + 1 if text else 0
+
+    def prepare(self, body: str) -> PreparedBody:
+        """Clean a body and fit it into the token budget."""
+        body = body or ""
+        text = self.fit(self.clean(body), self.max_tokens)
+        prepared = PreparedBody(text, self.estimate_tokens(body), self.estimate_tokens(text))
+        with self._lock:
+            self.messages += 1
+            self.original_tokens += prepared.original_tokens
+            self.tokens += prepared.tokens
+        return prepared
+
+    def stats(self) -> Dict[str, float]:
+        """Get the messages prepared this session and the estimated tokens saved."""
+        with self._lock:
+            saved = self.original_tokens - self.tokens
+            return {
+                "messages": self.messages,
+                "original_tokens": self.original_tokens,
+                "tokens": self.tokens,
+                "saved_ratio": saved / self.original_tokens if self.original_tokens else 0.0
+            }
+
+    @classmethod
+    def clean(cls, body: str) -> str:
+        """Strip quoted history, signatures, boilerplate and long URLs, and collapse whitespace."""
+        text = cls._INVISIBLE.sub("", body.replace("\r\n", "\n").replace("\r", "\n"))
+
+        # A message that is nothing but a reply header is left alone so something remains
+        for match in cls._REPLY_HEADER.finditer(text):
+            if cls._is_forward(text, match):
+                continue
+            if text[:match.start()].strip():
+                text = text[:match.start()]
+            break
+        text = cls._QUOTED_LINE.sub("", text)
+
+        match = cls._SIGNATURE.search(text)
+        if match and text[:match.start()].strip():
+            text = text[:match.start()]
+        text = cls._SENT_FROM.sub("", text)
+
+        text = cls._URL.sub(cls._shorten_url, text)
+        text = "\n".join(cls._SPACES.sub(" ", line).strip() for line in text.split("\n"))
+        paragraphs = [paragraph for paragraph in cls._PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+        # The first paragraph always stays, so the opening is never lost
+        while len(paragraphs) > 1 and cls._is_boilerplate(paragraphs[-1]):
+            paragraphs.pop()
+        text = "\n\n".join(paragraphs)
+
+        for match in cls._SIGN_OFF.finditer(text):
+            if text[:match.start()].strip() and cls._is_sign_off_tail(text[match.end():]):
+                text = text[:match.start()]
+                break
+        return cls._BLANK_LINES.sub("\n\n", text).strip()
+
+    @classmethod
+    def _is_forward(cls, text: str, match: "re.Match") -> bool:
+        """Check whether a header starts a forwarded message under a short note, rather than reply history."""
+        if match.group("wrote") or len(text[:match.start()].strip()) > cls.FORWARD_NOTE_CHARS:
+            return False
+        header = "\n".join(text[match.start():].split("\n", cls.HEADER_BLOCK_LINES)[:cls.HEADER_BLOCK_LINES])
+        subject = cls._HEADER_SUBJECT.search(header)
+        return not (subject and subject.group("reply"))
+
+    @classmethod
+    def _is_boilerplate(cls, paragraph: str) -> bool:
+        """Check whether most of a paragraph is disclaimer or mailing-list text and none of it asks anything."""
+        if "?" in paragraph or cls._REQUEST_CUE.search(paragraph):
+            return False
+        boilerplate = sum(
+            len(sentence) for sentence in cls._SENTENCE_BREAK.split(paragraph) if cls._BOILERPLATE.search(sentence)
+        )
+        return boilerplate * 2 > len(paragraph)
+
+    @classmethod
+    def _is_sign_off_tail(cls, tail: str) -> bool:
+        """Check that only a few short name, title or contact lines follow a sign-off."""
+        lines = [line.strip() for line in tail.split("\n") if line.strip()]
+        return len(lines) <= cls.SIGN_OFF_TAIL_LINES and all(
+            len(line) <= cls.SIGN_OFF_LINE_CHARS and not line.endswith("?") and not cls._REQUEST_CUE.search(line)
+            for line in lines
+        )
+
+    @classmethod
+    def fit(cls, text: str, max_tokens: int) -> str:
+        """Keep the most request-like paragraphs that fit in ``max_tokens``, in their original order."""
+        if cls.estimate_tokens(text) <= max_tokens:
+            return text
+
+        paragraphs = text.split("\n\n")
+        ranked = sorted(range(len(paragraphs)), key=lambda i: (-cls._relevance(paragraphs[i], i), i))
+        budget = max_tokens * cls.CHARS_PER_TOKEN
+        kept: List[int] = []
+        used = 0
+        for index in ranked:
+            cost = len(paragraphs[index]) + 2
+            if used + cost <= budget:
+                kept.append(index)
+                used += cost
+
+        if not kept:
+            # Even the best paragraph is too long; cut it at a word boundary
+            best = paragraphs[ranked[0]][:max(0, budget - len(cls.ELISION) - 1)]
+            return (best.rsplit(" ", 1)[0] + " " + cls.ELISION).lstrip()
+
+        kept.sort()
+        parts = []
+        for position, index in enumerate(kept):
+            if index > (kept[position - 1] + 1 if position else 0):
+                parts.append(cls.ELISION)
+            parts.append(paragraphs[index])
+        if kept[-1] < len(paragraphs) - 1:
+            parts.append(cls.ELISION)
+        return "\n\n".join(parts)
+
+    @classmethod
+    def _relevance(cls, paragraph: str, index: int) -> float:
+        """Score how likely a paragraph is to hold what the sender wants."""
+        score = 3.0 * paragraph.count("?")
+        score += 2.0 * len(cls._REQUEST_CUE.findall(paragraph))
+        score += 1.0 * len(cls._DATE_CUE.findall(paragraph))
+        if index == 0:
+            # Openings usually state the point
+            score += 2.0
+        # Favor dense paragraphs over long ones with the same cues
+        return score / (1.0 + len(paragraph) / 500.0)
+
+    @classmethod
+    def _shorten_url(cls, match: "re.Match") -> str:
+        url = match.group(0)
+        if len(url) <= cls.MAX_URL_CHARS:
+            return url
+        host = urlsplit(url if "://" in url else "http://" + url).hostname or "link"
+        return f"[{host} link]"
+
+
+def main():
+    """Command-line tool to report per-message savings for saved emails."""
+    parser = argparse.ArgumentParser(description="Show how much of each email would be sent to Claude.")
+    parser.add_argument("files", nargs="+", help="Raw .eml messages or plain-text bodies")
+    parser.add_argument("--max-tokens", type=int, default=500, help="Token budget per body (default: 500)")
+    parser.add_argument("--show", action="store_true", help="Print the prepared text too")
+    args = parser.parse_args()
+
+    preprocessor = EmailPreprocessor(args.max_tokens)
+    for path in args.files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        if path.lower().endswith(".eml"):
+            message = email.message_from_bytes(raw, policy=email.policy.default)
+            part = message.get_body(preferencelist=("plain",))
+            body = part.get_content() if part else ""
+        else:
+            body = raw.decode("utf-8", errors="replace")
+
+        prepared = preprocessor.prepare(body)
+        saved = prepared.saved_tokens / prepared.original_tokens if prepared.original_tokens else 0.0
+        print(f"{path}: {prepared.original_tokens} -> {prepared.tokens} tokens ({saved:.0%} saved)")
+        if args.show:
+            print(prepared.text + "\n")
+
+    stats = preprocessor.stats()
+    print(
+        f"Total: {stats['original_tokens']} -> {stats['tokens']} tokens over {stats['messages']} messages "
+        f"({stats['saved_ratio']:.0%} saved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,518 @@
+import base64
+import binascii
 import imaplib
 import email
+import quopri
 from email.header import decode_header
 from email.message import Message
 import datetime
-from typing import List, Dict, Optional
+import re
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
 from spam_blocker import SpamBlocker
+from spam_classifier import SpamClassifier
+from message_store import MessageStore
+from imap_pool import IMAPConnectionPool
+from imap_utils import MessageSet, FetchResponseParser, SearchCriteria, BodyStructure
+from email_utils import EmailRecord
 
 
 class EmailService:
     """Service class for handling email operations."""
     
-    def __init__(self, imap_server: str):
+    HEADER_FIELDS = "BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)]"
+    # LIST response line: (flags) "delimiter" name
+    LIST_PATTERN = re.compile(r'\((?P<flags>[^)]*)\) (?:"[^"]*"|NIL) (?P<name>.+)')
+    
+    def __init__(self, imap_server: str, batch_size: int = 500, headers_only: bool = True,
+                 store: Optional[MessageStore] = None, folder: str = "inbox",
+                 server_side_blocking: bool = True, search_max_length: int = 4000,
+                 search_max_exclusions: int = 8,
+                 pool_size: int = 3, keepalive_interval: int = 300, body_max_bytes: int = 0,
+                 spam_classifier: Optional[SpamClassifier] = None, purge_action: str = "move",
+                 junk_folder: str = ""):
         self.imap_server = imap_server
-        self.mail_connection: Optional[imaplib.IMAP4_SSL] = None
+        self.batch_size = batch_size
+        self.headers_only = headers_only
+        self.server_side_blocking = server_side_blocking
+        self.search_max_length = search_max_length
+        self.search_max_exclusions = search_max_exclusions
+        self.store = store
+        self.folder = folder
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+        self.body_max_bytes = body_max_bytes
+        self.spam_classifier = spam_classifier
+        self.purge_action = purge_action
+        self.junk_folder = junk_folder
+        self.pool: Optional[IMAPConnectionPool] = None
+        self._credentials: Optional[tuple] = None
     
     def connect(self, email_address: str, password: str) -> bool:
-        """Establish IMAP connection."""
+        """Establish the IMAP connection pool, verifying the credentials with a first session."""
         try:
-            self.mail_connection = imaplib.IMAP4_SSL(self.imap_server)
-            self.mail_connection.login(email_address, password)
+            self._credentials = (email_address, password)
+            self.pool = IMAPConnectionPool(
+                self._open_pooled_session, self.pool_size, self.keepalive_interval
+            )
+            # Open one session up front so bad credentials are reported immediately
+            self.pool.run(lambda session: None, retries=0)
+            self.pool.start_keepalive()
             return True
         except Exception as e:
             print(f"Failed to connect to email server: {e}")
-            self.mail_connection = None
+            self.pool = None
             return False
     
+    def open_session(self) -> imaplib.IMAP4_SSL:
+        """Open an additional authenticated IMAP session with the stored credentials."""
+        if not self._credentials:
+            raise Exception("No email credentials available.")
+
+        session = imaplib.IMAP4_SSL(self.imap_server)
+        session.login(*self._credentials)
+        return session
+    
+    def _open_pooled_session(self) -> imaplib.IMAP4_SSL:
+        """Open a session for the pool with the working folder already selected."""
+        session = self.open_session()
+        self.select_folder(session)
+        return session
+    
     def disconnect(self) -> None:
-        """Close IMAP connection."""
-        if self.mail_connection:
-            try:
-                self.mail_connection.logout()
-            except:
-                pass
-            self.mail_connection = None
+        """Close all IMAP connections."""
+        if self.pool:
+            self.pool.close_all()
+            self.pool = None
     
     def is_connected(self) -> bool:
         """Check if connection is active."""
-        return self.mail_connection is not None
+        return self.pool is not None
+    
+    def fetch_recent_emails(self, spam_blocker: SpamBlocker, days: int = 1,
+                            on_batch: Optional[Callable[[List[EmailRecord], int, int], None]] = None,
+                            cancel_event: Optional[threading.Event] = None) -> List[EmailRecord]:
+        """Fetch emails from the last specified number of days.
+
+        Messages already in the local store are served from it, so only
+        UIDs that have not been seen before are downloaded. When
+        ``on_batch`` is given, each chunk is reported newest first as
+        ``on_batch(emails, done, total)`` as soon as it is ready. Setting
+        ``cancel_event`` stops after the current chunk.
+        """
+        try:
+            emails = []
+            for batch, done, total in self._iter_batches(spam_blocker, days):
+                if cancel_event and cancel_event.is_set():
+                    break
+                emails.extend(batch)
+                if on_batch:
+                    on_batch(batch, done, total)
+            return emails
+
+        except Exception as e:
+            print(f"Error fetching emails: {e}")
+            return []
+    
+    def iter_recent_emails(self, spam_blocker: SpamBlocker, days: int = 1,
+                           include_body: bool = False) -> Iterator[List[EmailRecord]]:
+        """Yield emails from the last specified number of days in batches, newest first.
+
+        Unlike fetch_recent_emails nothing is accumulated, so memory stays
+        bounded by the batch size times the pool size however large the
+        date range is. With ``include_body`` each batch is downloaded with
+        full bodies even in header-only mode. Errors are raised to the caller.
+        """
+        for batch, _, _ in self._iter_batches(spam_blocker, days, include_body):
+            yield batch
+    
+    def _iter_batches(self, spam_blocker: SpamBlocker, days: int,
+                      include_body: bool = False) -> Iterator[Tuple[List[EmailRecord], int, int]]:
+        """Yield ``(emails, done, total)`` per chunk, keeping at most one chunk in flight per session."""
+        if not self.pool:
+            raise Exception("No active email connection.")
+
+        # Calculate the date for filtering emails
+        date_threshold = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%d-%b-%Y")
+
+        # Search for emails since the calculated date
+        uids = self.pool.run(
+            lambda session: self._search_uids(session, f"SINCE {date_threshold}", spam_blocker)
+        )
+        uids.sort(reverse=True)  # Most recent first
+
+        chunks = iter(MessageSet.chunks(uids, self.batch_size))
+        in_flight: Deque[Tuple[List[int], Future]] = deque()
+        done = 0
+        executor = ThreadPoolExecutor(max_workers=self.pool.size)
+        try:
+            while True:
+                # Keep the pool busy without reading ahead of the consumer
+                while len(in_flight) < self.pool.size:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    in_flight.append((chunk, executor.submit(self._load_chunk, chunk, include_body)))
+
+                if not in_flight:
+                    return
+
+                chunk, future = in_flight.popleft()
+                # Client-side filtering still catches senders the server could not match
+                batch = [e for e in future.result() if not spam_blocker.is_blocked(e.sender)]
+                if self.spam_classifier:
+                    # Content scoring hides spam from senders nobody has blocked yet
+                    batch = self.spam_classifier.filter(batch)
+                done += len(chunk)
+                yield batch, done, len(uids)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _load_chunk(self, uids: List[int], include_body: bool = False) -> List[EmailRecord]:
+        """Load a chunk of emails from the store, downloading any it does not have."""
+        cached = {}
+        if self.store:
+            # UIDs above the newest one stored have never been seen, so only look up the rest
+            last_uid = self.store.get_last_uid(self.folder)
+            known = [uid for uid in uids if uid <= last_uid]
+            cached = self.store.get_messages(self.folder, known) if known else {}
+        missing = [
+            uid for uid in uids
+            if uid not in cached or (include_body and not cached[uid].has_body)
+        ]
+
+        fetched = {}
+        if missing:
+            headers_only = self.headers_only and not include_body
+            batch = self.fetch_email_batch(missing, headers_only=headers_only)
+            if self.store:
+                self.store.save_messages(self.folder, batch)
+            fetched = {record.uid: record for record in batch}
+
+        return [fetched.get(uid) or cached[uid] for uid in uids if uid in fetched or uid in cached]
+    
+    def load_email_body(self, record: EmailRecord) -> bool:
+        """Download the body of a single email on demand and attach it to the record.
+
+        Only the displayed text part is transferred, located through
+        BODYSTRUCTURE; attachments and inline images are never downloaded.
+        """
+        # Opening a message marks it as read, as downloading RFC822 did
+        self.load_email_bodies([record], peek=False)
+        return record.has_body
     
-    def fetch_recent_emails(self, spam_blocker: SpamBlocker, days: int = 1) -> List[Dict]:
-        """Fetch emails from the last specified number of days."""
+    def load_email_bodies(self, records: List[EmailRecord], peek: bool = True) -> int:
+        """Download the text bodies of every record that does not have one yet.
+
+        Structures and text parts are fetched for a whole chunk of records
+        per command. With ``peek`` the messages are not marked as read.
+        Returns how many of the records have a body afterwards.
+        """
+        missing = [record for record in records if not record.has_body]
         try:
-            if not self.mail_connection:
+            if missing and not self.pool:
                 raise Exception("No active email connection.")
 
-            self.mail_connection.select("inbox")
+            for start in range(0, len(missing), self.batch_size):
+                chunk = missing[start:start + self.batch_size]
+
+                def load(session: imaplib.IMAP4_SSL) -> None:
+                    message_set = MessageSet.build([record.uid for record in chunk])
+                    res, msg_data = session.uid("FETCH", message_set, "(UID BODYSTRUCTURE)")
+                    structures = {}
+                    if res == "OK":
+                        structures = {
+                            message["uid"]: BodyStructure.from_meta(message["meta"])
+                            for message in FetchResponseParser.parse(msg_data)
+                        }
+                    self._load_bodies(session, chunk, structures, peek)
 
-            # Calculate the date for filtering emails
-            date_threshold = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%d-%b-%Y")
+                self.pool.run(load)
+                if self.store:
+                    for record in chunk:
+                        if record.has_body:
+                            self.store.save_body(self.folder, record)
 
-            # Search for emails since the calculated date
-            result, data = self.mail_connection.search(None, f'SINCE {date_threshold}')
+        except Exception as e:
+            print(f"Error fetching email bodies: {e}")
+        return sum(1 for record in records if record.has_body)
+    
+    def _search_uids(self, session: imaplib.IMAP4_SSL, criteria: str,
+                     spam_blocker: Optional[SpamBlocker] = None) -> List[int]:
+        """Run UID SEARCH, excluding blocked senders on the server when enabled.
+
+        The folder is re-selected first so UIDVALIDITY is checked on every
+        search. The blocklist is split into several SEARCH commands to
+        respect the server's command-length limit. After the first, each
+        search only covers the UIDs that are still left, and at most
+        ``search_max_exclusions`` searches are sent; senders beyond that are
+        left to client-side filtering.
+        """
+        self.select_folder(session)
+
+        pending: Deque[str] = deque()
+        if spam_blocker and self.server_side_blocking:
+            pending.extend(SearchCriteria.not_from(spam_blocker.get_server_search_terms()))
+
+        scope = criteria
+        uids: Optional[set] = None
+        for _ in range(max(1, self.search_max_exclusions)):
+            exclusion = SearchCriteria.take(pending, max(1, self.search_max_length - len(scope) - 1))
+            result, data = session.uid("SEARCH", None, f"{scope} {exclusion}".strip())
             if result != "OK":
                 raise Exception("Failed to search inbox.")
 
-            mail_ids = data[0].split()
-            emails = []
+            found = {int(uid) for uid in data[0].split()}
+            uids = found if uids is None else uids & found
+            if not uids or not pending:
+                break
 
-            for mail_id in reversed(mail_ids):  # Most recent first
-                email_data = self._fetch_single_email(mail_id)
-                if email_data and not spam_blocker.is_blocked(email_data["from"]):
-                    emails.append(email_data)
+            # Narrow the next search to the survivors unless their set would crowd out the exclusions
+            survivors = f"UID {MessageSet.build(uids)}"
+            if len(survivors) <= self.search_max_length // 2:
+                scope = survivors
 
-            return emails
+        return list(uids or [])
+    
+    def purge_senders(self, search_terms: List[str],
+                      on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Move every message matching the From terms to Junk, or delete it.
 
-        except Exception as e:
-            print(f"Error fetching emails: {e}")
+        One UID SEARCH FROM per term finds the sender's whole backlog in the
+        folder, which is then moved (or flagged \\Deleted and expunged) in
+        message-set chunks, reporting ``on_progress(done, total)`` after
+        each. Purged messages are dropped from the local store. Returns the
+        number of messages purged.
+        """
+        if not self.pool:
+            raise Exception("No active email connection.")
+        return self.pool.run(lambda session: self._purge(session, search_terms, on_progress))
+    
+    def _purge(self, session: imaplib.IMAP4_SSL, search_terms: List[str],
+               on_progress: Optional[Callable[[int, int], None]]) -> int:
+        """Search and purge on one session; safe to re-run after a reconnect."""
+        self.select_folder(session)
+
+        uids = set()
+        for term in search_terms:
+            quoted = SearchCriteria.quote(term)
+            if quoted is None:
+                continue
+            result, data = session.uid("SEARCH", None, "FROM", quoted)
+            if result != "OK":
+                raise Exception(f"Failed to search for {term}.")
+            uids.update(int(uid) for uid in data[0].split())
+        if not uids:
+            return 0
+
+        capabilities = self._capabilities(session)
+        junk_folder = None
+        if self.purge_action == "move":
+            junk_folder = self._find_junk_folder(session)
+            if not junk_folder:
+                raise Exception("No Junk folder found; set JUNK_FOLDER or PURGE_ACTION=delete.")
+            junk_folder = SearchCriteria.quote(junk_folder) or junk_folder
+        use_move = junk_folder is not None and "MOVE" in capabilities
+        use_uid_expunge = "UIDPLUS" in capabilities
+
+        uids = sorted(uids)
+        done = 0
+        for chunk in MessageSet.chunks(uids, self.batch_size):
+            message_set = MessageSet.build(chunk)
+            if use_move:
+                self._check_response(session.uid("MOVE", message_set, junk_folder), "move")
+            else:
+                if junk_folder:
+                    self._check_response(session.uid("COPY", message_set, junk_folder), "copy")
+                self._check_response(
+                    session.uid("STORE", message_set, "+FLAGS.SILENT", r"(\Deleted)"), "flag"
+                )
+                if use_uid_expunge:
+                    # Only expunge our own messages, not others already flagged \Deleted
+                    self._check_response(session.uid("EXPUNGE", message_set), "expunge")
+
+            if self.store:
+                self.store.delete_messages(self.folder, chunk)
+            done += len(chunk)
+            if on_progress:
+                on_progress(done, len(uids))
+
+        if not use_move and not use_uid_expunge:
+            self._check_response(session.expunge(), "expunge")
+        return len(uids)
+    
+    def _find_junk_folder(self, session: imaplib.IMAP4_SSL) -> Optional[str]:
+        """Use JUNK_FOLDER, or find the folder the server marks with the \\Junk special use."""
+        if self.junk_folder:
+            return self.junk_folder
+
+        result, data = session.list()
+        if result != "OK":
+            return None
+        for line in data:
+            match = isinstance(line, bytes) and self.LIST_PATTERN.match(line.decode("utf-8", "replace"))
+            if match and "\\junk" in match.group("flags").lower():
+                return match.group("name").strip('"')
+        return None
+    
+    @staticmethod
+    def _capabilities(session: imaplib.IMAP4_SSL) -> List[str]:
+        """Get the authenticated session's capabilities, upper-cased."""
+        result, data = session.capability()
+        return data[0].decode().upper().split() if result == "OK" and data[0] else []
+    
+    @staticmethod
+    def _check_response(response: Tuple[str, list], action: str) -> None:
+        """Raise if an IMAP command did not succeed."""
+        result, data = response
+        if result != "OK":
+            raise Exception(f"Failed to {action} messages: {data}")
+    
+    def select_folder(self, session: imaplib.IMAP4_SSL) -> Optional[int]:
+        """Select the working folder and validate the local store against it.
+
+        Returns the folder's UIDVALIDITY, or None if the server did not report one.
+        """
+        result, _ = session.select(self.folder)
+        if result != "OK":
+            raise Exception(f"Failed to select {self.folder}.")
+
+        _, data = session.response("UIDVALIDITY")
+        if not data or not data[0]:
+            return None
+        uidvalidity = int(data[0])
+        if self.store:
+            self.store.sync_folder(self.folder, uidvalidity)
+        return uidvalidity
+    
+    def fetch_email_batch(self, uids: List[int], connection: Optional[imaplib.IMAP4_SSL] = None,
+                          headers_only: Optional[bool] = None) -> List[EmailRecord]:
+        """Fetch and parse a chunk of emails with a single UID FETCH command.
+
+        Without an explicit connection the chunk runs on a pooled session.
+        ``headers_only`` overrides the service's list mode for this chunk.
+        """
+        if headers_only is None:
+            headers_only = self.headers_only
+        if connection is None:
+            return self.pool.run(lambda session: self.fetch_email_batch(uids, session, headers_only))
+
+        message_set = MessageSet.build(uids)
+        structure_item = "" if headers_only else " BODYSTRUCTURE"
+        fetch_items = f"(UID RFC822.SIZE{structure_item} {self.HEADER_FIELDS})"
+
+        res, msg_data = connection.uid("FETCH", message_set, fetch_items)
+        if res != "OK":
+            print(f"Error fetching emails {message_set}")
             return []
+
+        parsed = {}
+        structures = {}
+        for message in FetchResponseParser.parse(msg_data):
+            raw = next(iter(message["literals"].values()), None)
+            if raw is None or message["uid"] is None:
+                continue
+
+            record = self._parse_email(message["uid"], raw, include_body=False)
+            if record:
+                size_match = re.search(r"RFC822\.SIZE (\d+)", message["meta"])
+                record.size = int(size_match.group(1)) if size_match else None
+                parsed[message["uid"]] = record
+                if not headers_only:
+                    structures[message["uid"]] = BodyStructure.from_meta(message["meta"])
+
+        if not headers_only and parsed:
+            self._load_bodies(connection, list(parsed.values()), structures, peek=True)
+
+        # Preserve the caller's ordering rather than the server's
+        return [parsed[uid] for uid in uids if parsed.get(uid)]
     
-    def _fetch_single_email(self, mail_id: bytes) -> Optional[Dict]:
-        """Fetch and parse a single email."""
-        try:
-            res, msg_data = self.mail_connection.fetch(mail_id, "(RFC822)")
-            if res != "OK":
-                return None
+    def _load_bodies(self, connection: imaplib.IMAP4_SSL, records: List[EmailRecord],
+                     structures: Dict[int, Optional[List]], peek: bool) -> None:
+        """Download just the displayable text part of each record's body.
+
+        Records are grouped by section number so each group costs one UID
+        FETCH. Records whose structure could not be parsed fall back to a
+        full download.
+        """
+        by_section = defaultdict(list)
+        fallback = []
+        for record in records:
+            structure = structures.get(record.uid)
+            if structure is None:
+                fallback.append(record)
+                continue
 
-            msg = email.message_from_bytes(msg_data[0][1])
+            part = BodyStructure.find_text_part(structure)
+            if part is None:
+                record.set_body(b"")  # No text/plain part to show
+            else:
+                by_section[part["section"]].append((record, part))
+
+        for section, entries in by_section.items():
+            sections = self._fetch_section(connection, [record.uid for record, _ in entries], section, peek)
+            for record, part in entries:
+                data = sections.get(record.uid)
+                if data is None:
+                    fallback.append(record)
+                else:
+                    record.set_body(self._decode_transfer_encoding(data, part["encoding"]), part["charset"])
+
+        if fallback:
+            self._load_full_bodies(connection, fallback, peek)
+    
+    def _fetch_section(self, connection: imaplib.IMAP4_SSL, uids: List[int],
+                       section: str, peek: bool) -> Dict[int, bytes]:
+        """Fetch one body section for several messages, capped at body_max_bytes if set."""
+        command = "BODY.PEEK" if peek else "BODY"
+        partial = f"<0.{self.body_max_bytes}>" if self.body_max_bytes > 0 else ""
+        res, msg_data = connection.uid(
+            "FETCH", MessageSet.build(uids), f"(UID {command}[{section}]{partial})"
+        )
+        if res != "OK":
+            return {}
+
+        return {
+            message["uid"]: next(iter(message["literals"].values()))
+            for message in FetchResponseParser.parse(msg_data)
+            if message["uid"] is not None and message["literals"]
+        }
+    
+    def _load_full_bodies(self, connection: imaplib.IMAP4_SSL, records: List[EmailRecord], peek: bool) -> None:
+        """Download whole messages and extract their bodies the slow way."""
+        fetch_item = "BODY.PEEK[]" if peek else "RFC822"
+        res, msg_data = connection.uid(
+            "FETCH", MessageSet.build([record.uid for record in records]), f"(UID {fetch_item})"
+        )
+        if res != "OK":
+            return
+
+        by_uid = {record.uid: record for record in records}
+        for message in FetchResponseParser.parse(msg_data):
+            raw = next(iter(message["literals"].values()), None)
+            record = by_uid.get(message["uid"])
+            if raw is not None and record is not None:
+                record.set_body(*self._extract_email_body(email.message_from_bytes(raw)))
+    
+    @staticmethod
+    def _decode_transfer_encoding(data: bytes, encoding: str) -> bytes:
+        """Undo a part's Content-Transfer-Encoding, tolerating truncated partial fetches."""
+        try:
+            if encoding == "base64":
+                compact = re.sub(rb"[^A-Za-z0-9+/=]", b"", data)
+                return base64.b64decode(compact[:len(compact) - len(compact) % 4])
+            if encoding == "quoted-printable":
+                return quopri.decodestring(data)
+        except (binascii.Error, ValueError) as e:
+            print(f"Error decoding email body: {e}")
+        return data
+    
+    def _parse_email(self, uid: int, raw_email: bytes, include_body: bool = True) -> Optional[EmailRecord]:
+        """Parse a raw RFC822 email, or just its headers when include_body is False."""
+        try:
+            msg = email.message_from_bytes(raw_email)
 
             # Decode subject
             subject, encoding = decode_header(msg["Subject"])[0]
@@ -85,23 +522,22 @@ class EmailService:
             from_ = msg.get("From")
             date_ = msg.get("Date")
 
-            # Extract email body
-            body = self._extract_email_body(msg)
+            record = EmailRecord(uid, subject, from_, date_, len(raw_email))
+
+            # Extract email body; without it the record is loaded lazily on open
+            if include_body:
+                record.set_body(*self._extract_email_body(msg))
 
-            return {
-                "subject": subject,
-                "from": from_,
-                "date": date_,
-                "body": body
-            }
+            return record
 
         except Exception as e:
-            print(f"Error processing email {mail_id}: {e}")
+            print(f"Error processing email {uid}: {e}")
             return None
     
-    def _extract_email_body(self, msg: Message) -> str:
-        """Extract text body from email message."""
-        body = ""
+    def _extract_email_body(self, msg: Message) -> Tuple[bytes, str]:
+        """Extract the undecoded text body and its charset from an email message."""
+        body = b""
+        charset = "utf-8"
         try:
             if msg.is_multipart():
                 for part in msg.walk():
@@ -109,16 +545,14 @@ class EmailService:
                     content_disposition = str(part.get("Content-Disposition"))
 
                     if content_type == "text/plain" and "attachment" not in content_disposition:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            body = payload.decode("utf-8", errors="ignore")
+                        body = part.get_payload(decode=True) or b""
+                        charset = part.get_content_charset() or charset
                         break
             else:
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    body = payload.decode("utf-8", errors="ignore")
+                body = msg.get_payload(decode=True) or b""
+                charset = msg.get_content_charset() or charset
         except Exception as e:
             print(f"Error extracting email body: {e}")
-            body = "Error reading email content"
+            body = b"Error reading email content"
         
-        return body
\ No newline at end of file
+        return body, charset
\ No newline at end of file
@@ -1,7 +1,45 @@
 import email.utils
 import datetime
+import functools
 import re
-from typing import Dict
+from typing import NamedTuple, Optional
+
+
+class ParsedSender(NamedTuple):
+    """A From header split into its parts; ``address`` and ``domain`` are lower-cased."""
+    display_name: str
+    address: str
+    domain: str
+
+
+class SenderParser:
+    """Single place where From headers are parsed, memoized in a bounded LRU cache.
+
+    The same sender shows up on many messages and is parsed again by the
+    filter, the list renderer and block actions, so each distinct header
+    is parsed once with ``email.utils.parseaddr``.
+    """
+    
+    CACHE_SIZE = 4096
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def parse(from_header: str) -> ParsedSender:
+        """Parse a From header such as ``"Name <user@example.com>"``."""
+        if not from_header:
+            return ParsedSender("", "", "")
+        
+        name, address = email.utils.parseaddr(from_header)
+        if "@" not in address:
+            # Not a usable address; keep the raw text so nothing is silently dropped
+            address = from_header.strip()
+        address = address.lower()
+        return ParsedSender(name.strip(), address, address.rpartition("@")[2] if "@" in address else "")
+    
+    @staticmethod
+    def cache_info():
+        """Get the parse cache's hits, misses and current size."""
+        return SenderParser.parse.cache_info()
 
 
 class EmailFormatter:
@@ -13,10 +51,8 @@ class EmailFormatter:
         if not from_address:
             return "Unknown Sender"
         
-        name_match = re.match(r"([^<]+)", from_address)
-        if name_match:
-            return name_match.group(1).strip()
-        return from_address
+        # The parsed address is lower-cased for matching; show it as the sender wrote it
+        return SenderParser.parse(from_address).display_name or from_address.strip()
     
     @staticmethod
     def format_subject(subject: str, max_chars: int = 50) -> str:
@@ -31,37 +67,49 @@ class EmailFormatter:
     @staticmethod
     def format_date(date_string: str) -> str:
         """Format email date for display."""
+        return EmailFormatter.format_datetime(EmailFormatter.parse_date(date_string))
+    
+    @staticmethod
+    def parse_date(date_string: str) -> Optional[datetime.datetime]:
+        """Parse an email Date header, returning None if it is malformed."""
         try:
-            email_date = email.utils.parsedate_to_datetime(date_string)
-            now = datetime.datetime.now()
-            
-            # Show time if today, otherwise show date
-            if email_date.date() == now.date():
-                return email_date.strftime("%I:%M %p").lstrip("0")
-            else:
-                return email_date.strftime("%b %d")
+            return email.utils.parsedate_to_datetime(date_string)
         except:
+            return None
+    
+    @staticmethod
+    def format_datetime(email_date: Optional[datetime.datetime]) -> str:
+        """Format a parsed email date for display."""
+        if email_date is None:
             return "Unknown Date"
+        
+        now = datetime.datetime.now()
+        
+        # Show time if today, otherwise show date
+        if email_date.date() == now.date():
+            return email_date.strftime("%I:%M %p").lstrip("0")
+        else:
+            return email_date.strftime("%b %d")
     
     @staticmethod
-    def format_email_list_item(email_data: Dict) -> str:
-        """Format email data for listbox display."""
-        name = EmailFormatter.format_sender_name(email_data["from"])
-        subject = EmailFormatter.format_subject(email_data["subject"])
-        date_str = EmailFormatter.format_date(email_data["date"])
+    def format_email_list_item(record: "EmailRecord") -> str:
+        """Format an email record for listbox display."""
+        name = EmailFormatter.format_sender_name(record.sender)
+        subject = EmailFormatter.format_subject(record.subject)
+        date_str = EmailFormatter.format_datetime(record.datetime)
         
         return f"{name} - {subject} - {date_str}\n\n"
     
     @staticmethod
-    def format_email_content(email_data: Dict) -> str:
-        """Format email data for content display."""
+    def format_email_content(record: "EmailRecord") -> str:
+        """Format an email record for content display."""
         separator = "-" * 80
         return (
-            f"Subject: {email_data['subject']}\n"
-            f"From: {email_data['from']}\n"
-            f"Date: {email_data['date']}\n"
+            f"Subject: {record.subject}\n"
+            f"From: {record.sender}\n"
+            f"Date: {record.date}\n"
             f"{separator}\n\n"
-            f"{email_data['body']}\n\n"
+            f"{record.body}\n\n"
             f"{separator}"
         )
 
@@ -69,26 +117,97 @@ class EmailFormatter:
 class EmailValidator:
     """Utility class for email validation."""
     
+    # Simple regex for email validation, compiled once for bulk imports
+    EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+    
     @staticmethod
     def is_valid_email(email_address: str) -> bool:
         """Basic email validation."""
         if not email_address:
             return False
         
-        # Simple regex for email validation
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email_address.strip()) is not None
+        return EmailValidator.EMAIL_PATTERN.match(email_address.strip()) is not None
     
     @staticmethod
     def extract_email_from_string(email_string: str) -> str:
-        """Extract email address from various formats."""
-        if not email_string:
-            return ""
-        
-        # Extract from "Name <email@domain.com>" format
-        email_match = re.search(r'<([^>]+)>', email_string)
-        if email_match:
-            return email_match.group(1).strip()
-        
-        # Return original if already in plain format
-        return email_string.strip()
\ No newline at end of file
+        """Extract the lower-cased email address from various formats."""
+        return SenderParser.parse(email_string).address
+
+
+class EmailRecord:
+    """Compact record for one email.
+
+    Display fields are derived once and cached. The body is kept as the raw
+    bytes of its MIME part and only decoded when it is displayed.
+    """
+    
+    __slots__ = (
+        "uid", "subject", "sender", "date", "size",
+        "_body", "_charset", "_address", "_datetime", "_display_line"
+    )
+    
+    _UNSET = object()
+    
+    def __init__(self, uid: int, subject: Optional[str], sender: Optional[str], date: Optional[str],
+                 size: Optional[int] = None, body: Optional[bytes] = None, charset: str = "utf-8"):
+        self.uid = uid
+        self.subject = subject
+        self.sender = sender
+        self.date = date
+        self.size = size
+        self._body = body
+        self._charset = charset
+        self._address = None
+        self._datetime = EmailRecord._UNSET
+        self._display_line = None
+    
+    @property
+    def address(self) -> str:
+        """Lower-cased sender address, e.g. ``user@example.com``."""
+        if self._address is None:
+            self._address = SenderParser.parse(self.sender).address
+        return self._address
+    
+    @property
+    def datetime(self) -> Optional[datetime.datetime]:
+        """Parsed Date header, or None if it is missing or malformed."""
+        if self._datetime is EmailRecord._UNSET:
+            self._datetime = EmailFormatter.parse_date(self.date)
+        return self._datetime
+    
+    @property
+    def display_line(self) -> str:
+        """Formatted listbox line."""
+        if self._display_line is None:
+            self._display_line = EmailFormatter.format_email_list_item(self)
+        return self._display_line
+    
+    @property
+    def has_body(self) -> bool:
+        """Whether the body has been downloaded."""
+        return self._body is not None
+    
+    @property
+    def raw_body(self) -> Optional[bytes]:
+        """Undecoded body bytes."""
+        return self._body
+    
+    @property
+    def charset(self) -> str:
+        """Charset used to decode the body."""
+        return self._charset
+    
+    @property
+    def body(self) -> Optional[str]:
+        """Decoded body text, or None if it has not been downloaded yet."""
+        if self._body is None:
+            return None
+        try:
+            return self._body.decode(self._charset, errors="ignore")
+        except LookupError:
+            return self._body.decode("utf-8", errors="ignore")
+    
+    def set_body(self, body: bytes, charset: str = "utf-8") -> None:
+        """Attach a downloaded body."""
+        self._body = body
+        self._charset = charset
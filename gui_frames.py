@@ -1,7 +1,7 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from typing import Callable, List, Dict, Optional
-from email_utils import EmailFormatter
+from email_utils import EmailFormatter, EmailRecord
 
 
 class StartupFrame:
@@ -76,6 +76,9 @@ class EmailListFrame:
         self.callbacks = callbacks
         self.email_listbox: Optional[tk.Listbox] = None
         self.checklist_listbox: Optional[tk.Listbox] = None
+        self.progress_frame: Optional[tk.Frame] = None
+        self.progress_label: Optional[tk.Label] = None
+        self.progress_bar: Optional[ttk.Progressbar] = None
         self.email_context_menu: Optional[tk.Menu] = None
         self.checklist_context_menu: Optional[tk.Menu] = None
         self._create_widgets()
@@ -103,12 +106,30 @@ class EmailListFrame:
 
         tk.Label(email_frame, text="Email List", font=("Arial", 16)).pack(pady=5)
         
+        # Fetch progress, shown only while a fetch is running
+        self.progress_frame = tk.Frame(email_frame)
+        self.progress_label = tk.Label(self.progress_frame, text="", font=("Arial", 10))
+        self.progress_label.pack(side=tk.LEFT, padx=5)
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="determinate", length=150)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        tk.Button(
+            self.progress_frame,
+            text="Cancel",
+            command=self.callbacks.get("cancel_fetch")
+        ).pack(side=tk.RIGHT, padx=5)
+        
         self.email_listbox = tk.Listbox(email_frame, activestyle="none")
         self.email_listbox.pack(fill=tk.BOTH, expand=True)
         self.email_listbox.bind("<Motion>", self._highlight_email)
         self.email_listbox.bind("<<ListboxSelect>>", self._on_email_select)
         self.email_listbox.bind("<Button-3>", self._show_email_context_menu)
 
+        tk.Button(
+            email_frame,
+            text="Generate Checklist for All",
+            command=self.callbacks.get("generate_checklist_all")
+        ).pack(pady=5)
+
         # Email context menu
         self.email_context_menu = tk.Menu(self.email_listbox, tearoff=0)
         self.email_context_menu.add_command(label="Block Sender", command=self._block_sender)
@@ -200,12 +221,41 @@ class EmailListFrame:
         if selected_idx:
             self.checklist_listbox.delete(selected_idx)
     
-    def populate_email_list(self, emails: List[Dict]):
-        """Populate email listbox with email data."""
+    def populate_email_list(self, emails: List[EmailRecord]):
+        """Populate email listbox with email records."""
         self.email_listbox.delete(0, tk.END)
-        for email_data in emails:
-            formatted_item = EmailFormatter.format_email_list_item(email_data)
-            self.email_listbox.insert(tk.END, formatted_item)
+        for record in emails:
+            self.email_listbox.insert(tk.END, record.display_line)
+    
+    def clear_email_list(self):
+        """Remove all emails from the listbox."""
+        self.email_listbox.delete(0, tk.END)
+    
+    def append_emails(self, emails: List[EmailRecord]):
+        """Add a batch of emails to the bottom of the list."""
+        for record in emails:
+            self.email_listbox.insert(tk.END, record.display_line)
+    
+    def show_progress(self, done: int, total: int, action: str = "Loading"):
+        """Show fetch progress above the email list."""
+        if not self.progress_frame.winfo_ismapped():
+            self.progress_frame.pack(fill=tk.X, pady=(0, 5), before=self.email_listbox)
+        
+        if total:
+            self.progress_label.config(text=f"{action} {done} of {total}...")
+            self.progress_bar.config(mode="determinate", maximum=total, value=done)
+        else:
+            self.progress_label.config(text="Searching...")
+            self.progress_bar.config(mode="determinate", maximum=1, value=0)
+    
+    def hide_progress(self):
+        """Hide the fetch progress indicator."""
+        self.progress_frame.pack_forget()
+    
+    def prepend_emails(self, emails: List[EmailRecord]):
+        """Insert newly arrived emails at the top of the list, newest first."""
+        for record in reversed(emails):
+            self.email_listbox.insert(0, record.display_line)
     
     def get_selected_email_index(self) -> Optional[int]:
         """Get index of selected email."""
@@ -220,13 +270,21 @@ class EmailContentFrame:
         self.frame = tk.Frame(parent)
         self.callbacks = callbacks
         self.content_text: Optional[tk.Text] = None
-        self.current_email_data: Optional[Dict] = None
+        self.stream_frame: Optional[tk.LabelFrame] = None
+        self.stream_text: Optional[tk.Text] = None
+        self.current_email: Optional[EmailRecord] = None
         self._create_widgets()
     
     def _create_widgets(self):
         self.content_text = tk.Text(self.frame, wrap="word", width=80, height=25)
         self.content_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
+        # Summaries and suggestions are written here as they stream in
+        self.stream_frame = tk.LabelFrame(self.frame, text="Claude")
+        self.stream_frame.pack(padx=10, fill=tk.X)
+        self.stream_text = tk.Text(self.stream_frame, wrap="word", height=4, state=tk.DISABLED)
+        self.stream_text.pack(padx=5, pady=5, fill=tk.X)
+
         # Button frame for multiple buttons
         button_frame = tk.Frame(self.frame)
         button_frame.pack(pady=10)
@@ -247,29 +305,65 @@ class EmailContentFrame:
             fg="white",
             font=("Arial", 10, "bold")
         ).pack(side=tk.LEFT, padx=5)
+
+        # Summarize button
+        tk.Button(
+            button_frame,
+            text="Summarize",
+            command=self._summarize_email
+        ).pack(side=tk.LEFT, padx=5)
     
     def _generate_checklist_item(self):
         """Generate a checklist item from the current email."""
-        if self.callbacks.get("generate_checklist_item") and self.current_email_data:
-            self.callbacks["generate_checklist_item"](self.current_email_data)
+        if self.callbacks.get("generate_checklist_item") and self.current_email:
+            self.callbacks["generate_checklist_item"](self.current_email)
     
-    def display_email(self, email_data: Dict):
+    def _summarize_email(self):
+        """Summarize the current email."""
+        if self.callbacks.get("summarize_email") and self.current_email:
+            self.callbacks["summarize_email"](self.current_email)
+    
+    def display_email(self, record: EmailRecord):
         """Display email content."""
-        self.current_email_data = email_data
+        self.current_email = record
         self.content_text.delete(1.0, tk.END)
-        content = EmailFormatter.format_email_content(email_data)
+        content = EmailFormatter.format_email_content(record)
         self.content_text.insert(tk.END, content)
+        self.begin_stream("Claude")
+    
+    def begin_stream(self, title: str):
+        """Clear the streamed output area and label what is about to arrive."""
+        self.stream_frame.config(text=title)
+        self.stream_text.config(state=tk.NORMAL)
+        self.stream_text.delete(1.0, tk.END)
+        self.stream_text.config(state=tk.DISABLED)
+    
+    def append_stream(self, text: str):
+        """Append streamed text as it arrives."""
+        self.stream_text.config(state=tk.NORMAL)
+        self.stream_text.insert(tk.END, text)
+        self.stream_text.see(tk.END)
+        self.stream_text.config(state=tk.DISABLED)
 
 
 class SpamSettingsFrame:
     """Frame for spam blocking settings."""
     
+    LIST_FILETYPES = [
+        ("Text files", "*.txt"),
+        ("CSV files", "*.csv"),
+        ("JSON files", "*.json"),
+        ("All files", "*.*")
+    ]
+    
     def __init__(self, parent: tk.Widget, callbacks: Dict[str, Callable]):
         self.frame = tk.Frame(parent)
         self.callbacks = callbacks
         self.block_email_entry: Optional[tk.Entry] = None
         self.blocked_listbox: Optional[tk.Listbox] = None
         self.blocked_context_menu: Optional[tk.Menu] = None
+        self.import_button: Optional[tk.Button] = None
+        self.status_label: Optional[tk.Label] = None
         self._create_widgets()
     
     def _create_widgets(self):
@@ -280,13 +374,13 @@ class SpamSettingsFrame:
         add_frame = tk.Frame(self.frame)
         add_frame.pack(pady=10)
 
-        tk.Label(add_frame, text="Block Email Address:", font=("Arial", 12)).pack(side=tk.LEFT, padx=5)
+        tk.Label(add_frame, text="Block Address or Rule:", font=("Arial", 12)).pack(side=tk.LEFT, padx=5)
         self.block_email_entry = tk.Entry(add_frame, width=30)
         self.block_email_entry.pack(side=tk.LEFT, padx=5)
         tk.Button(add_frame, text="Add", command=self._add_blocked_email).pack(side=tk.LEFT, padx=5)
 
         # Blocked emails list
-        tk.Label(self.frame, text="Blocked Email Addresses:", font=("Arial", 12)).pack(pady=(20, 5))
+        tk.Label(self.frame, text="Blocked Addresses and Rules:", font=("Arial", 12)).pack(pady=(20, 5))
         
         list_frame = tk.Frame(self.frame)
         list_frame.pack(pady=5, padx=20, fill=tk.BOTH, expand=True)
@@ -304,6 +398,23 @@ class SpamSettingsFrame:
         # Context menu
         self.blocked_context_menu = tk.Menu(self.blocked_listbox, tearoff=0)
         self.blocked_context_menu.add_command(label="Unblock", command=self._unblock_email)
+        self.blocked_context_menu.add_command(label="Purge From Server", command=self._purge_selected)
+
+        # Bulk import/export
+        file_frame = tk.Frame(self.frame)
+        file_frame.pack(pady=5)
+
+        self.import_button = tk.Button(file_frame, text="Import List...", command=self._import_blocklist)
+        self.import_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(file_frame, text="Export List...", command=self._export_blocklist).pack(side=tk.LEFT, padx=5)
+        tk.Button(
+            file_frame,
+            text="Purge From Server",
+            command=self._purge_all
+        ).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(self.frame, text="", font=("Arial", 10))
+        self.status_label.pack()
 
         # Back button
         tk.Button(
@@ -335,8 +446,45 @@ class SpamSettingsFrame:
             email_address = self.blocked_listbox.get(selected_idx)
             self.callbacks["unblock_email"](email_address)
     
+    def _purge_all(self):
+        """Purge the messages of every blocked sender from the server."""
+        if self.callbacks.get("purge_blocked"):
+            self.callbacks["purge_blocked"](None)
+    
+    def _purge_selected(self):
+        """Purge the selected rule's messages from the server."""
+        selected_idx = self.blocked_listbox.curselection()
+        if selected_idx and self.callbacks.get("purge_blocked"):
+            self.callbacks["purge_blocked"]([self.blocked_listbox.get(selected_idx)])
+    
+    def show_status(self, text: str):
+        """Show a status message below the import/export buttons."""
+        self.status_label.config(text=text)
+    
+    def _import_blocklist(self):
+        """Pick a rule list file and hand it to the import callback."""
+        path = filedialog.askopenfilename(title="Import Blocklist", filetypes=self.LIST_FILETYPES)
+        if path and self.callbacks.get("import_blocklist"):
+            self.callbacks["import_blocklist"](path)
+    
+    def _export_blocklist(self):
+        """Pick a destination file and hand it to the export callback."""
+        path = filedialog.asksaveasfilename(
+            title="Export Blocklist", filetypes=self.LIST_FILETYPES, defaultextension=".txt"
+        )
+        if path and self.callbacks.get("export_blocklist"):
+            self.callbacks["export_blocklist"](path)
+    
+    def set_importing(self, importing: bool):
+        """Disable the import button while an import runs."""
+        self.import_button.config(
+            state=tk.DISABLED if importing else tk.NORMAL,
+            text="Importing..." if importing else "Import List..."
+        )
+    
     def refresh_blocked_list(self, blocked_emails: List[str]):
         """Refresh the blocked emails list."""
         self.blocked_listbox.delete(0, tk.END)
-        for email_address in blocked_emails:
-            self.blocked_listbox.insert(tk.END, email_address)
\ No newline at end of file
+        if blocked_emails:
+            # One insert call keeps large lists fast
+            self.blocked_listbox.insert(tk.END, *blocked_emails)
\ No newline at end of file
@@ -0,0 +1,176 @@
+import imaplib
+import queue
+import select
+import ssl
+import threading
+import time
+from typing import List, Optional
+
+from email_service import EmailService
+from email_utils import EmailRecord
+
+
+class IdleListener:
+    """Background IMAP IDLE session that pushes newly arrived emails onto a queue.
+
+    The listener keeps its own connection next to the EmailService one, so
+    the GUI's session is never shared across threads. Each item put on the
+    queue is a list of EmailRecord objects, newest first.
+    """
+
+    # RFC 2177 asks clients to re-issue IDLE at least every 29 minutes
+    DEFAULT_IDLE_TIMEOUT = 29 * 60
+    # How often the listener wakes up to check for a stop request
+    POLL_INTERVAL = 1.0
+    # Delay before reconnecting after the session drops
+    RECONNECT_DELAY = 30
+
+    def __init__(self, email_service: EmailService, new_mail_queue: queue.Queue,
+                 idle_timeout: int = DEFAULT_IDLE_TIMEOUT):
+        self.email_service = email_service
+        self.new_mail_queue = new_mail_queue
+        self.idle_timeout = idle_timeout
+        self.session: Optional[imaplib.IMAP4_SSL] = None
+        self.last_uid = 0
+        self.uidvalidity: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start listening in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="imap-idle", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the listener to finish its IDLE and log out."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.POLL_INTERVAL * 5)
+            self._thread = None
+
+    def _run(self) -> None:
+        """Keep an IDLE session alive until stopped, reconnecting on failure."""
+        while not self._stop_event.is_set():
+            try:
+                self._open_session()
+                if not self._supports_idle():
+                    print("IMAP server does not support IDLE; push mode disabled.")
+                    return
+
+                while not self._stop_event.is_set():
+                    if self._idle():
+                        self._fetch_new_emails()
+            except Exception as e:
+                print(f"IDLE listener error: {e}")
+                self._stop_event.wait(self.RECONNECT_DELAY)
+            finally:
+                self._close_session()
+
+    def _open_session(self) -> None:
+        """Open and select a dedicated session, catching up on mail that arrived while disconnected."""
+        self.session = self.email_service.open_session()
+        uidvalidity = self.email_service.select_folder(self.session)
+
+        if self.last_uid and uidvalidity == self.uidvalidity:
+            # Reconnected: anything above the last seen UID arrived while the session was down
+            self._fetch_new_emails()
+            return
+
+        # First start, or the server renumbered the folder: only mail arriving from now on is new
+        self.uidvalidity = uidvalidity
+        _, data = self.session.response("UIDNEXT")
+        if data and data[0]:
+            self.last_uid = int(data[0]) - 1
+        else:
+            result, data = self.session.uid("SEARCH", None, "ALL")
+            self.last_uid = int(data[0].split()[-1]) if result == "OK" and data[0] else 0
+
+    def _supports_idle(self) -> bool:
+        """Check the authenticated session's capabilities for IDLE."""
+        result, data = self.session.capability()
+        return result == "OK" and b"IDLE" in data[0].upper().split()
+
+    def _close_session(self) -> None:
+        """Log out of the listener's session."""
+        if self.session:
+            try:
+                self.session.logout()
+            except Exception:
+                pass
+            self.session = None
+
+    def _idle(self) -> bool:
+        """Run one IDLE command; return True if new messages were announced."""
+        tag = self.session._new_tag()
+        self.session.send(tag + b" IDLE\r\n")
+
+        line = self.session.readline()
+        if not line.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+
+        has_new_mail = False
+        deadline = time.monotonic() + self.idle_timeout
+
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            if not self._has_buffered_data():
+                readable, _, _ = select.select([self.session.sock], [], [], self.POLL_INTERVAL)
+                if not readable:
+                    continue
+
+            line = self.session.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("IDLE connection closed by server.")
+            if line.startswith(b"*") and line.rstrip().upper().endswith(b"EXISTS"):
+                has_new_mail = True
+                break
+
+        # End the IDLE and drain untagged responses up to its completion
+        self.session.send(b"DONE\r\n")
+        while True:
+            line = self.session.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("IDLE connection closed by server.")
+            if line.startswith(tag):
+                break
+            if line.rstrip().upper().endswith(b"EXISTS"):
+                has_new_mail = True
+
+        return has_new_mail
+
+    def _has_buffered_data(self) -> bool:
+        """Check without blocking for bytes already read by imaplib or the TLS layer.
+
+        Lines that arrived together with an earlier one sit in imaplib's
+        buffered reader, where ``select`` on the socket cannot see them.
+        """
+        sock = self.session.sock
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            return bool(self.session.file.peek(1))
+        except (ssl.SSLWantReadError, BlockingIOError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    def _fetch_new_emails(self) -> None:
+        """Fetch messages above the last seen UID and queue them for the GUI."""
+        result, data = self.session.uid("SEARCH", None, f"UID {self.last_uid + 1}:*")
+        if result != "OK" or not data[0]:
+            return
+
+        # "n:*" always matches the newest message, even when it is below n
+        uids = sorted((int(uid) for uid in data[0].split() if int(uid) > self.last_uid), reverse=True)
+        if not uids:
+            return
+
+        emails: List[EmailRecord] = self.email_service.fetch_email_batch(uids, connection=self.session)
+        self.last_uid = uids[0]
+
+        if emails:
+            if self.email_service.store:
+                self.email_service.store.save_messages(self.email_service.folder, emails)
+            self.new_mail_queue.put(emails)
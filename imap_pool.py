@@ -0,0 +1,169 @@
+import imaplib
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class IMAPConnectionPool:
+    """Small pool of authenticated IMAP sessions with keepalive and reconnect.
+
+    Sessions are created lazily by ``session_factory`` up to ``size``. A
+    session that has sat idle longer than ``keepalive_interval`` is checked
+    with NOOP before it is handed out, and a background thread NOOPs idle
+    sessions so servers do not drop them. Operations run through ``run``
+    are retried on a fresh session when the connection breaks.
+    """
+
+    # Errors that mean the session itself is unusable, not that the command failed
+    CONNECTION_ERRORS = (imaplib.IMAP4.abort, OSError, EOFError)
+
+    def __init__(self, session_factory: Callable[[], imaplib.IMAP4_SSL], size: int = 3,
+                 keepalive_interval: int = 300):
+        self.session_factory = session_factory
+        self.size = max(1, size)
+        self.keepalive_interval = keepalive_interval
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Signalled whenever a session is returned or a slot is freed
+        self._available = threading.Condition(self._lock)
+        self._closed = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+
+    def start_keepalive(self) -> None:
+        """Start the background NOOP keepalive thread."""
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive_loop, name="imap-keepalive", daemon=True
+        )
+        self._keepalive_thread.start()
+
+    @contextmanager
+    def session(self) -> Iterator[imaplib.IMAP4_SSL]:
+        """Check out a healthy session for the duration of a ``with`` block."""
+        session = self._acquire()
+        broken = False
+        try:
+            yield session
+        except self.CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            # Command failures leave the session usable; only a lost connection drops it
+            if broken:
+                self._discard(session)
+            else:
+                self._release(session)
+
+    def run(self, operation: Callable[[imaplib.IMAP4_SSL], T], retries: int = 1) -> T:
+        """Run ``operation`` on a pooled session, reconnecting and retrying on connection loss."""
+        for attempt in range(retries + 1):
+            try:
+                with self.session() as session:
+                    return operation(session)
+            except self.CONNECTION_ERRORS as e:
+                if attempt == retries:
+                    raise
+                print(f"IMAP session lost ({e}); reconnecting...")
+
+    def close_all(self) -> None:
+        """Log out every idle session and stop the keepalive thread."""
+        with self._available:
+            self._closed.set()
+            # Callers waiting for a session fail instead of waiting forever
+            self._available.notify_all()
+        for session in self._drain_idle():
+            self._logout(session)
+
+    def _acquire(self) -> imaplib.IMAP4_SSL:
+        """Get an idle session, open a new one, or wait for one to be released or discarded."""
+        with self._available:
+            while True:
+                if self._closed.is_set():
+                    raise imaplib.IMAP4.abort("Connection pool is closed.")
+                try:
+                    session, last_used = self._idle.get_nowait()
+                    break
+                except queue.Empty:
+                    pass
+                # Re-checked after every wake-up, since a discarded session frees its slot
+                if self._created < self.size:
+                    self._created += 1
+                    session = None
+                    break
+                self._available.wait()
+
+        if session is None:
+            return self._open()
+        if time.monotonic() - last_used > self.keepalive_interval and not self._is_alive(session):
+            # Replace the dead session in the same slot
+            self._logout(session)
+            return self._open()
+        return session
+
+    def _open(self) -> imaplib.IMAP4_SSL:
+        """Open a new session, giving the slot back if that fails."""
+        try:
+            return self.session_factory()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, session: imaplib.IMAP4_SSL) -> None:
+        """Return a session to the pool."""
+        if self._closed.is_set():
+            self._discard(session)
+            return
+        with self._available:
+            self._idle.put((session, time.monotonic()))
+            self._available.notify()
+
+    def _discard(self, session: imaplib.IMAP4_SSL) -> None:
+        """Drop a broken session and free its slot."""
+        self._logout(session)
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _drain_idle(self) -> List[imaplib.IMAP4_SSL]:
+        """Remove and return all currently idle sessions."""
+        sessions = []
+        while True:
+            try:
+                session, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return sessions
+            sessions.append(session)
+
+    def _keepalive_loop(self) -> None:
+        """NOOP idle sessions periodically so the server keeps them open."""
+        while not self._closed.wait(self.keepalive_interval):
+            for session in self._drain_idle():
+                if self._is_alive(session):
+                    self._release(session)
+                else:
+                    self._discard(session)
+
+    @staticmethod
+    def _is_alive(session: imaplib.IMAP4_SSL) -> bool:
+        """Check a session with NOOP."""
+        try:
+            result, _ = session.noop()
+            return result == "OK"
+        except Exception:
+            return False
+
+    @staticmethod
+    def _logout(session: imaplib.IMAP4_SSL) -> None:
+        """Log out of a session, ignoring errors from dead connections."""
+        try:
+            session.logout()
+        except Exception:
+            pass
@@ -0,0 +1,241 @@
+import itertools
+import re
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+
+class MessageSet:
+    """Utility class for building IMAP message-set strings."""
+
+    @staticmethod
+    def build(ids: Sequence[Union[bytes, int, str]]) -> str:
+        """Compress message ids into an IMAP message set, e.g. ``1:500,502``."""
+        numbers = sorted({int(i) for i in ids})
+        if not numbers:
+            return ""
+
+        ranges = []
+        start = prev = numbers[0]
+        for number in numbers[1:]:
+            if number == prev + 1:
+                prev = number
+                continue
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = number
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+
+        return ",".join(ranges)
+
+    @staticmethod
+    def chunks(ids: Sequence, size: int) -> List[List]:
+        """Split message ids into consecutive chunks of at most ``size``."""
+        size = max(1, size)
+        return [list(ids[i:i + size]) for i in range(0, len(ids), size)]
+
+
+class FetchResponseParser:
+    """Utility class for parsing multi-message IMAP FETCH responses."""
+
+    _MESSAGE_START = re.compile(rb"^(\d+) \(")
+    _UID = re.compile(r"\bUID (\d+)")
+    _LITERAL_NAME = re.compile(
+        rb"(BODY\[[^\]]*\](?:<\d+>)?|RFC822(?:\.HEADER|\.TEXT)?)\s*\{\d+\}$"
+    )
+    _LITERAL_MARKER = re.compile(rb"\{\d+\}$")
+
+    @staticmethod
+    def parse(data: List) -> List[Dict]:
+        """Group a raw FETCH response into one dict per message.
+
+        Each dict holds the sequence number (``id``), the non-literal
+        attribute text (``meta``), the ``uid`` if one was returned and a
+        mapping of literal item names such as ``RFC822`` to their bytes
+        (``literals``).
+        """
+        messages: List[Dict] = []
+        current = None
+
+        for item in data:
+            if isinstance(item, tuple):
+                head, literal = item[0], item[1]
+            elif isinstance(item, bytes):
+                head, literal = item, None
+            else:
+                continue
+
+            start = FetchResponseParser._MESSAGE_START.match(head)
+            if start:
+                current = {"id": start.group(1), "meta": b"", "literals": {}}
+                messages.append(current)
+                head = head[start.end():]
+            elif current is None:
+                continue
+
+            if literal is not None:
+                name = FetchResponseParser._LITERAL_NAME.search(head)
+                if name:
+                    current["literals"][name.group(1).decode()] = literal
+                    head = head[:name.start()]
+                else:
+                    # A literal string inside an attribute such as BODYSTRUCTURE;
+                    # inline it as a quoted string so the attribute still parses
+                    marker = FetchResponseParser._LITERAL_MARKER.search(head)
+                    if marker:
+                        escaped = literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"')
+                        head = head[:marker.start()] + b'"' + escaped + b'"'
+
+            current["meta"] += head + b" "
+
+        for message in messages:
+            message["meta"] = message["meta"].decode("utf-8", errors="ignore")
+            uid = FetchResponseParser._UID.search(message["meta"])
+            message["uid"] = int(uid.group(1)) if uid else None
+
+        return messages
+
+
+class BodyStructure:
+    """Utility class for parsing IMAP BODYSTRUCTURE responses."""
+
+    _TOKEN = re.compile(r'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+
+    @staticmethod
+    def from_meta(meta: str) -> Optional[List]:
+        """Extract and parse the BODYSTRUCTURE attribute from FETCH response text."""
+        start = meta.find("BODYSTRUCTURE")
+        if start == -1:
+            return None
+        try:
+            structure, _ = BodyStructure._parse_list(meta, start + len("BODYSTRUCTURE"))
+            return structure
+        except (ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def _parse_list(text: str, pos: int) -> Tuple[List, int]:
+        """Parse one parenthesized list starting at or after ``pos``."""
+        token = BodyStructure._TOKEN.match(text, pos)
+        if not token or not token.group(1):
+            raise ValueError("Expected '(' in BODYSTRUCTURE.")
+        pos = token.end()
+
+        items: List = []
+        while True:
+            token = BodyStructure._TOKEN.match(text, pos)
+            if not token:
+                raise ValueError("Unterminated BODYSTRUCTURE.")
+            if token.group(1):
+                item, pos = BodyStructure._parse_list(text, pos)
+                items.append(item)
+                continue
+
+            pos = token.end()
+            if token.group(2):
+                return items, pos
+            if token.group(3) is not None:
+                items.append(re.sub(r"\\(.)", r"\1", token.group(3)))
+            else:
+                atom = token.group(4)
+                items.append(None if atom.upper() == "NIL" else atom)
+
+    @staticmethod
+    def find_text_part(structure: List) -> Optional[Dict]:
+        """Find the part to display, mirroring the full-message body extraction.
+
+        A single-part message uses its only part whatever its type; a
+        multipart message uses the first ``text/plain`` part that is not an
+        attachment. Returns the part's ``section`` number, transfer
+        ``encoding``, ``charset`` and ``size``, or None if there is none.
+        """
+        if structure and isinstance(structure[0], list):
+            return BodyStructure._find_in_multipart(structure, "")
+        return BodyStructure._describe_part(structure, "1")
+
+    @staticmethod
+    def _find_in_multipart(structure: List, prefix: str) -> Optional[Dict]:
+        """Walk multipart children depth first looking for inline text/plain."""
+        # Child parts come first; the subtype string ends them
+        for number, part in enumerate(itertools.takewhile(lambda p: isinstance(p, list), structure)):
+            section = f"{prefix}{number + 1}"
+            if part and isinstance(part[0], list):
+                found = BodyStructure._find_in_multipart(part, f"{section}.")
+            elif BodyStructure._is_inline_text(part):
+                found = BodyStructure._describe_part(part, section)
+            else:
+                found = None
+            if found:
+                return found
+        return None
+
+    @staticmethod
+    def _is_inline_text(part: List) -> bool:
+        """Check for a text/plain part without an attachment disposition."""
+        if len(part) < 7 or str(part[0]).lower() != "text" or str(part[1]).lower() != "plain":
+            return False
+        # Text parts carry a line count, so the disposition follows MD5 at index 9
+        disposition = part[9] if len(part) > 9 else None
+        return not (isinstance(disposition, list) and disposition
+                    and str(disposition[0]).lower() == "attachment")
+
+    @staticmethod
+    def _describe_part(part: List, section: str) -> Optional[Dict]:
+        """Summarize a single body part."""
+        if len(part) < 7:
+            return None
+
+        params = part[2] if isinstance(part[2], list) else []
+        charset = "utf-8"
+        for key, value in zip(params[::2], params[1::2]):
+            if str(key).lower() == "charset" and value:
+                charset = value
+
+        try:
+            size = int(part[6])
+        except (TypeError, ValueError):
+            size = None
+
+        return {
+            "section": section,
+            "encoding": str(part[5] or "7bit").lower(),
+            "charset": charset,
+            "size": size
+        }
+
+
+class SearchCriteria:
+    """Utility class for building IMAP SEARCH criteria."""
+
+    @staticmethod
+    def quote(value: str) -> Optional[str]:
+        """Quote a value as an IMAP string, or return None if it needs a literal."""
+        if not value or not all(32 <= ord(char) < 127 for char in value):
+            return None
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+
+    @staticmethod
+    def not_from(terms: Sequence[str]) -> List[str]:
+        """Turn From-header substrings into ``NOT FROM`` criteria.
+
+        Terms that cannot be sent as a quoted string are skipped and left to
+        client-side filtering.
+        """
+        criteria = []
+        for term in terms:
+            quoted = SearchCriteria.quote(term)
+            if quoted is not None:
+                criteria.append(f"NOT FROM {quoted}")
+        return criteria
+
+    @staticmethod
+    def take(criteria: Deque[str], max_length: int) -> str:
+        """Pop criteria off the front of ``criteria`` while their joined length stays within ``max_length``.
+
+        At least one criterion is taken, so a single long one still makes progress.
+        """
+        current = ""
+        while criteria:
+            if current and len(current) + 1 + len(criteria[0]) > max_length:
+                break
+            criterion = criteria.popleft()
+            current = f"{current} {criterion}" if current else criterion
+        return current
@@ -3,16 +3,21 @@ Main application file for the Email Viewer with Spam Blocking.
 This file ties together all the components and provides the main GUI application.
 """
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Optional
 import re
 
 # Import our custom modules
 from config import config
 from spam_blocker import SpamBlocker
 from email_service import EmailService
-from email_utils import EmailFormatter, EmailValidator
+from message_store import MessageStore
+from idle_listener import IdleListener
+from spam_classifier import SpamClassifier
+from email_utils import EmailFormatter, EmailValidator, EmailRecord
 from gui_frames import StartupFrame, EmailListFrame, EmailContentFrame, SpamSettingsFrame
 from claude_service import claude_service
 
@@ -26,11 +31,58 @@ class EmailApp(tk.Tk):
         self.geometry(f"{config.window_width}x{config.window_height}")
         
         # Initialize services
-        self.email_service = EmailService(config.imap_server)
-        self.spam_blocker = SpamBlocker(config.blocked_emails_file)
+        self.message_store = MessageStore(config.message_store_file)
+        self.spam_classifier: Optional[SpamClassifier] = None
+        if config.spam_filter:
+            if SpamClassifier.is_available():
+                self.spam_classifier = SpamClassifier(
+                    config.spam_model_file, threshold=config.spam_score_threshold
+                )
+            else:
+                print("NumPy is not installed; content-based spam filtering is disabled.")
+        self.email_service = EmailService(
+            config.imap_server,
+            batch_size=config.fetch_batch_size,
+            headers_only=config.headers_only,
+            store=self.message_store,
+            server_side_blocking=config.server_side_blocking,
+            search_max_length=config.search_max_length,
+            search_max_exclusions=config.search_max_exclusions,
+            pool_size=config.imap_pool_size,
+            keepalive_interval=config.imap_keepalive_interval,
+            body_max_bytes=config.body_max_bytes,
+            spam_classifier=self.spam_classifier,
+            purge_action=config.purge_action,
+            junk_folder=config.junk_folder
+        )
+        self.spam_blocker = SpamBlocker(
+            config.blocked_emails_file,
+            compact_threshold=config.blocklist_compact_threshold,
+            shared_list_files=config.shared_blocklist_files
+        )
         
         # Data storage
-        self.email_data: List[Dict] = []
+        self.email_data: List[EmailRecord] = []
+        
+        # Push mode: new mail arrives from a background IDLE session
+        self.new_mail_queue: queue.Queue = queue.Queue()
+        self.idle_listener: Optional[IdleListener] = None
+        
+        # Background fetch state; batches arrive on fetch_queue
+        self.fetch_queue: Optional[queue.Queue] = None
+        self.fetch_cancel_event: Optional[threading.Event] = None
+        
+        # Server-side purge of blocked senders' mail; progress arrives on purge_queue
+        self.purge_queue: Optional[queue.Queue] = None
+        
+        # Batch checklist generation for the whole list; results arrive on checklist_queue
+        self.checklist_queue: Optional[queue.Queue] = None
+        
+        # Body download for the email being opened; the result arrives on body_queue
+        self.body_queue: Optional[queue.Queue] = None
+        
+        # Streamed summary or suggestion for the open email; text arrives on stream_queue
+        self.stream_queue: Optional[queue.Queue] = None
         
         # Configure grid weights
         self.grid_rowconfigure(0, weight=1)
@@ -60,17 +112,23 @@ class EmailApp(tk.Tk):
         list_callbacks = {
             "email_selected": self._display_email_content,
             "block_sender": self._block_sender,
+            "cancel_fetch": self._cancel_fetch,
+            "generate_checklist_all": self._generate_checklist_for_all,
             "back_to_startup": lambda: self.show_frame("startup")
         }
         
         content_callbacks = {
             "back_to_list": lambda: self.show_frame("list"),
-            "generate_checklist_item": self._generate_checklist_item
+            "generate_checklist_item": self._generate_checklist_item,
+            "summarize_email": self._summarize_email
         }
         
         spam_callbacks = {
             "add_blocked_email": self._add_blocked_email,
             "unblock_email": self._unblock_email,
+            "import_blocklist": self._import_blocklist,
+            "export_blocklist": self._export_blocklist,
+            "purge_blocked": self._purge_blocked,
             "back_to_startup": lambda: self.show_frame("startup")
         }
         
@@ -107,36 +165,150 @@ class EmailApp(tk.Tk):
                 "Connection Error", 
                 "Failed to connect to the email server. Please check your credentials."
             )
+        elif config.push_mode:
+            self.idle_listener = IdleListener(
+                self.email_service, self.new_mail_queue, config.idle_timeout
+            )
+            self.idle_listener.start()
+            self.after(500, self._drain_new_mail)
+    
+    def _drain_new_mail(self):
+        """Move emails announced by the IDLE listener into the email list."""
+        try:
+            while True:
+                emails = self.new_mail_queue.get_nowait()
+                emails = [e for e in emails if not self.spam_blocker.is_blocked(e.sender)]
+                if self.spam_classifier:
+                    emails = self.spam_classifier.filter(emails)
+                if emails:
+                    self.email_data[0:0] = emails
+                    self.frames["list"].prepend_emails(emails)
+        except queue.Empty:
+            pass
+        
+        self.after(500, self._drain_new_mail)
     
     def _fetch_and_show_emails(self):
-        """Fetch emails and display them in the list frame."""
+        """Fetch emails in the background and stream them into the list frame."""
         if not self.email_service.is_connected():
             messagebox.showerror("Error", "Email connection is not established.")
             return
         
+        # A new fetch supersedes any one still running
+        self._cancel_fetch()
+        
+        self.email_data = []
+        self.frames["list"].clear_email_list()
+        self.frames["list"].show_progress(0, 0)
+        self.show_frame("list")
+        
+        self.fetch_queue = queue.Queue()
+        self.fetch_cancel_event = threading.Event()
+        threading.Thread(
+            target=self._fetch_worker,
+            args=(self.fetch_queue, self.fetch_cancel_event),
+            daemon=True
+        ).start()
+        self.after(100, self._drain_fetch_queue, self.fetch_queue)
+    
+    def _fetch_worker(self, fetch_queue: queue.Queue, cancel_event: threading.Event):
+        """Run the email fetch off the Tk thread, queueing each batch."""
         try:
-            # Fetch emails using the email service
-            self.email_data = self.email_service.fetch_recent_emails(self.spam_blocker)
-            
-            # Populate the email list frame
-            self.frames["list"].populate_email_list(self.email_data)
-            
-            # Show the list frame
-            self.show_frame("list")
-            
-            if not self.email_data:
-                messagebox.showinfo("No Emails", "No recent emails found.")
+            self.email_service.fetch_recent_emails(
+                self.spam_blocker,
+                on_batch=lambda emails, done, total: fetch_queue.put(("batch", emails, done, total)),
+                cancel_event=cancel_event
+            )
+        finally:
+            fetch_queue.put(("done", [], 0, 0))
+    
+    def _drain_fetch_queue(self, fetch_queue: queue.Queue):
+        """Add fetched batches to the email list as they arrive."""
+        if fetch_queue is not self.fetch_queue:
+            return  # Cancelled or superseded by a newer fetch
+        
+        try:
+            while True:
+                kind, emails, done, total = fetch_queue.get_nowait()
+                if kind == "done":
+                    self.fetch_queue = None
+                    self.frames["list"].hide_progress()
+                    if not self.email_data:
+                        messagebox.showinfo("No Emails", "No recent emails found.")
+                    return
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch emails: {e}")
+                self.email_data.extend(emails)
+                self.frames["list"].append_emails(emails)
+                self.frames["list"].show_progress(done, total)
+        except queue.Empty:
+            pass
+        
+        self.after(100, self._drain_fetch_queue, fetch_queue)
+    
+    def _cancel_fetch(self):
+        """Stop the running background fetch, keeping what was already shown."""
+        if self.fetch_cancel_event:
+            self.fetch_cancel_event.set()
+            self.fetch_cancel_event = None
+        self.fetch_queue = None
+        self.frames["list"].hide_progress()
     
     def _display_email_content(self, event):
         """Display the selected email content."""
         selected_idx = self.frames["list"].get_selected_email_index()
         if selected_idx is not None and selected_idx < len(self.email_data):
-            email_data = self.email_data[selected_idx]
-            self.frames["content"].display_email(email_data)
-            self.show_frame("content")
+            record = self.email_data[selected_idx]
+            
+            if record.has_body:
+                self.body_queue = None
+                self._show_email(record)
+                return
+            
+            # Bodies are downloaded lazily in header-only list mode, off the Tk thread
+            self.body_queue = queue.Queue()
+            threading.Thread(
+                target=self._body_worker,
+                args=(record, self.body_queue),
+                daemon=True
+            ).start()
+            self.after(100, self._drain_body_queue, self.body_queue, record)
+    
+    def _body_worker(self, record: EmailRecord, body_queue: queue.Queue):
+        """Download one email body off the Tk thread."""
+        try:
+            body_queue.put(self.email_service.load_email_body(record))
+        except Exception as e:
+            print(f"Error downloading email body: {e}")
+            body_queue.put(False)
+    
+    def _drain_body_queue(self, body_queue: queue.Queue, record: EmailRecord):
+        """Show the email once its body has arrived."""
+        # A newer selection replaced this download; drop its result
+        if body_queue is not self.body_queue:
+            return
+        
+        try:
+            loaded = body_queue.get_nowait()
+        except queue.Empty:
+            self.after(100, self._drain_body_queue, body_queue, record)
+            return
+        
+        self.body_queue = None
+        if not loaded:
+            messagebox.showerror("Error", "Failed to download email content.")
+            return
+        self._show_email(record)
+    
+    def _show_email(self, record: EmailRecord):
+        """Open an email whose body is available in the content view."""
+        if self.spam_classifier:
+            # Opening a message counts as keeping it
+            self.spam_classifier.learn([record], is_spam=False)
+        
+        # Output still streaming for the previous email is dropped
+        self.stream_queue = None
+        self.frames["content"].display_email(record)
+        self.show_frame("content")
     
     def _block_sender(self):
         """Block the sender of the selected email."""
@@ -144,11 +316,8 @@ class EmailApp(tk.Tk):
         if selected_idx is None or selected_idx >= len(self.email_data):
             return
         
-        email_info = self.email_data[selected_idx]
-        sender = email_info["from"]
-        
-        # Extract clean email address
-        email_address = EmailValidator.extract_email_from_string(sender)
+        # Clean sender address, cached on the record
+        email_address = self.email_data[selected_idx].address
         
         if not EmailValidator.is_valid_email(email_address):
             messagebox.showerror("Error", "Invalid email address format.")
@@ -162,14 +331,36 @@ class EmailApp(tk.Tk):
         
         if result:
             self.spam_blocker.add_blocked_email(email_address)
+            if self.spam_classifier:
+                # Everything listed from this sender is a spam example
+                self.spam_classifier.learn(
+                    [e for e in self.email_data if e.address == email_address], is_spam=True
+                )
+                self.spam_classifier.save()
             messagebox.showinfo("Success", f"Blocked {email_address}")
-            # Refresh email list to hide blocked emails
-            self._fetch_and_show_emails()
+            
+            if messagebox.askyesno(
+                "Clean Up Mailbox",
+                f"Also remove existing mail from {email_address} on the server?"
+            ):
+                # Refresh once the backlog is gone so the fetch is smaller
+                self._start_purge(
+                    [email_address],
+                    lambda done, total: self.frames["list"].show_progress(done, total, "Purging"),
+                    lambda count: self._fetch_and_show_emails()
+                )
+            else:
+                # Refresh email list to hide blocked emails
+                self._fetch_and_show_emails()
     
     def _add_blocked_email(self, email_address: str) -> bool:
-        """Add an email address to the blocked list."""
-        if not EmailValidator.is_valid_email(email_address):
-            messagebox.showerror("Error", "Please enter a valid email address.")
+        """Add an email address or block rule to the blocked list."""
+        if not SpamBlocker.is_valid_rule(email_address):
+            messagebox.showerror(
+                "Error",
+                "Please enter a valid email address, a domain rule such as "
+                "*@example.com or *.example.com, or a re:pattern."
+            )
             return False
         
         self.spam_blocker.add_blocked_email(email_address)
@@ -195,7 +386,136 @@ class EmailApp(tk.Tk):
             else:
                 messagebox.showerror("Error", "Email address not found in blocked list.")
     
-    def _generate_checklist_item(self, email_data: Dict):
+    def _purge_blocked(self, rules: Optional[List[str]]):
+        """Purge mail from the given block rules, or from all of them, on the server."""
+        rules = rules or self.spam_blocker.get_blocked_emails()
+        if not rules:
+            messagebox.showinfo("Purge", "There are no blocked senders to purge.")
+            return
+        
+        action = "move to Junk" if config.purge_action == "move" else "permanently delete"
+        target = rules[0] if len(rules) == 1 else f"all {len(rules)} blocked senders and rules"
+        if not messagebox.askyesno("Purge From Server", f"Find and {action} all mail from {target}?"):
+            return
+        
+        def on_done(count: Optional[int]):
+            self.frames["spam"].show_status("")
+            if count is not None:
+                messagebox.showinfo("Purge Complete", f"Removed {count} messages from the server.")
+        
+        self._start_purge(
+            rules,
+            lambda done, total: self.frames["spam"].show_status(f"Purging {done} of {total} messages..."),
+            on_done
+        )
+    
+    def _start_purge(self, rules: List[str], on_progress: Callable[[int, int], None],
+                     on_done: Callable[[Optional[int]], None]):
+        """Run a server-side purge on a background thread, reporting back on the Tk thread.
+
+        ``on_done`` receives the number of purged messages, or None if the purge failed.
+        """
+        if not self.email_service.is_connected():
+            messagebox.showerror("Error", "Email connection is not established.")
+            return
+        if self.purge_queue:
+            messagebox.showinfo("Purge", "A purge is already running.")
+            return
+        
+        search_terms = [term for rule in rules for term in SpamBlocker.search_terms_for_rule(rule)]
+        if not search_terms:
+            messagebox.showerror("Error", "Pattern rules cannot be matched on the server.")
+            return
+        
+        self.purge_queue = queue.Queue()
+        threading.Thread(
+            target=self._purge_worker,
+            args=(search_terms, self.purge_queue),
+            daemon=True
+        ).start()
+        self.after(100, self._drain_purge_queue, self.purge_queue, on_progress, on_done)
+    
+    def _purge_worker(self, search_terms: List[str], purge_queue: queue.Queue):
+        """Purge matching messages off the Tk thread, queueing progress."""
+        try:
+            count = self.email_service.purge_senders(
+                search_terms,
+                on_progress=lambda done, total: purge_queue.put(("progress", done, total))
+            )
+            purge_queue.put(("done", count, count))
+        except Exception as e:
+            purge_queue.put(("error", e, 0))
+    
+    def _drain_purge_queue(self, purge_queue: queue.Queue, on_progress: Callable[[int, int], None],
+                           on_done: Callable[[Optional[int]], None]):
+        """Forward purge progress to the GUI until the worker finishes."""
+        try:
+            while True:
+                kind, value, total = purge_queue.get_nowait()
+                if kind == "progress":
+                    on_progress(value, total)
+                    continue
+                
+                self.purge_queue = None
+                if kind == "error":
+                    messagebox.showerror("Error", f"Error purging messages: {value}")
+                    value = None
+                on_done(value)
+                return
+        except queue.Empty:
+            pass
+        
+        self.after(100, self._drain_purge_queue, purge_queue, on_progress, on_done)
+    
+    def _import_blocklist(self, path: str):
+        """Import a rule list file on a background thread."""
+        self.frames["spam"].set_importing(True)
+        result_queue = queue.Queue()
+        threading.Thread(
+            target=self._import_worker,
+            args=(path, result_queue),
+            daemon=True
+        ).start()
+        self.after(100, self._drain_import_queue, result_queue)
+    
+    def _import_worker(self, path: str, result_queue: queue.Queue):
+        """Read, validate and store an imported list off the Tk thread."""
+        try:
+            result_queue.put(self.spam_blocker.import_rules(path))
+        except Exception as e:
+            result_queue.put(e)
+    
+    def _drain_import_queue(self, result_queue: queue.Queue):
+        """Report the import result once the worker has finished."""
+        try:
+            result = result_queue.get_nowait()
+        except queue.Empty:
+            self.after(100, self._drain_import_queue, result_queue)
+            return
+        
+        self.frames["spam"].set_importing(False)
+        if isinstance(result, Exception):
+            messagebox.showerror("Error", f"Error importing blocklist: {result}")
+            return
+        
+        added, invalid = result
+        self.frames["spam"].refresh_blocked_list(
+            self.spam_blocker.get_blocked_emails()
+        )
+        message = f"Imported {added} new rules."
+        if invalid:
+            message += f"\n{len(invalid)} invalid entries were skipped (first: {invalid[0]!r})."
+        messagebox.showinfo("Import Complete", message)
+    
+    def _export_blocklist(self, path: str):
+        """Export the blocklist to a file."""
+        try:
+            self.spam_blocker.export_rules(path)
+            messagebox.showinfo("Success", f"Exported blocklist to {path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error exporting blocklist: {e}")
+    
+    def _generate_checklist_item(self, record: EmailRecord):
         """Generate a checklist item from email content using Claude API."""
         if not claude_service or not claude_service.is_available():
             messagebox.showerror(
@@ -213,9 +533,9 @@ class EmailApp(tk.Tk):
             
             # Generate checklist item using Claude
             checklist_item = claude_service.generate_checklist_item(
-                email_subject=email_data["subject"],
-                email_body=email_data["body"],
-                email_sender=email_data["from"]
+                email_subject=record.subject,
+                email_body=record.body,
+                email_sender=record.sender
             )
             
             if checklist_item:
@@ -237,7 +557,7 @@ class EmailApp(tk.Tk):
                     )
                     
                     if more_items:
-                        self._generate_multiple_checklist_items(email_data)
+                        self._generate_multiple_checklist_items(record)
             else:
                 messagebox.showerror(
                     "Generation Failed", 
@@ -250,14 +570,14 @@ class EmailApp(tk.Tk):
                 f"Error generating checklist item: {e}"
             )
     
-    def _generate_multiple_checklist_items(self, email_data: Dict):
+    def _generate_multiple_checklist_items(self, record: EmailRecord):
         """Generate multiple checklist items from email content."""
         try:
             # Generate multiple items
             checklist_items = claude_service.generate_multiple_checklist_items(
-                email_subject=email_data["subject"],
-                email_body=email_data["body"],
-                email_sender=email_data["from"],
+                email_subject=record.subject,
+                email_body=record.body,
+                email_sender=record.sender,
                 count=3
             )
             
@@ -285,8 +605,8 @@ class EmailApp(tk.Tk):
                 f"Error generating multiple checklist items: {e}"
             )
     
-    def _generate_checklist_item(self, email_data: Dict):
-        """Generate a checklist item from email content using Claude API."""
+    def _generate_checklist_item(self, record: EmailRecord):
+        """Generate a checklist item from email content using Claude API, streaming it as it is written."""
         if not claude_service or not claude_service.is_available():
             messagebox.showerror(
                 "Claude API Not Available", 
@@ -294,43 +614,217 @@ class EmailApp(tk.Tk):
             )
             return
         
-        try:
-            # Show loading message
-            self.update_idletasks()  # Update GUI before showing loading
-            
-            # Generate checklist item using Claude
-            checklist_item = claude_service.generate_checklist_item(
-                email_subject=email_data["subject"],
-                email_body=email_data["body"],
-                email_sender=email_data["from"]
+        self._start_stream(
+            "Suggested checklist item",
+            claude_service.stream_checklist_item(
+                email_subject=record.subject,
+                email_body=record.body,
+                email_sender=record.sender
+            ),
+            self._offer_streamed_checklist_item
+        )
+    
+    def _offer_streamed_checklist_item(self, text: str):
+        """Ask before adding a finished streamed suggestion to the checklist."""
+        checklist_item = claude_service.clean_checklist_item(text)
+        if not checklist_item:
+            messagebox.showerror(
+                "Generation Failed", 
+                "Failed to generate checklist item. Please try again."
             )
-            
-            if checklist_item:
-                # Ask user if they want to add the generated item
-                result = messagebox.askyesno(
-                    "Add Checklist Item",
-                    f'Generated checklist item:\n\n"{checklist_item}"\n\nAdd this to your checklist?'
-                )
-                
-                if result:
-                    # Add to checklist in the list frame
-                    self.frames["list"].checklist_listbox.insert(tk.END, checklist_item)
-                    messagebox.showinfo("Success", "Checklist item added!")
-            else:
-                messagebox.showerror(
-                    "Generation Failed", 
-                    "Failed to generate checklist item. Please try again."
-                )
-                
+            return
+        
+        # Ask user if they want to add the generated item
+        result = messagebox.askyesno(
+            "Add Checklist Item",
+            f'Generated checklist item:\n\n"{checklist_item}"\n\nAdd this to your checklist?'
+        )
+        
+        if result:
+            # Add to checklist in the list frame
+            self.frames["list"].checklist_listbox.insert(tk.END, checklist_item)
+            messagebox.showinfo("Success", "Checklist item added!")
+    
+    def _summarize_email(self, record: EmailRecord):
+        """Stream a summary of the email into the content view."""
+        if not claude_service or not claude_service.is_available():
+            messagebox.showerror(
+                "Claude API Not Available", 
+                "Claude API is not configured. Please set CLAUDE_API_KEY in your .env file."
+            )
+            return
+        
+        def on_done(text: str):
+            if not text.strip():
+                messagebox.showerror("Summary Failed", "Failed to summarize email. Please try again.")
+        
+        self._start_stream(
+            "Summary",
+            claude_service.stream_summary(
+                email_subject=record.subject,
+                email_body=record.body,
+                email_sender=record.sender
+            ),
+            on_done
+        )
+    
+    def _start_stream(self, title: str, chunks: Iterator[str], on_done: Callable[[str], None]):
+        """Show streamed text in the content view as it arrives, replacing any stream in progress."""
+        self.stream_queue = queue.Queue()
+        self.frames["content"].begin_stream(title)
+        threading.Thread(
+            target=self._stream_worker,
+            args=(chunks, self.stream_queue),
+            daemon=True
+        ).start()
+        self.after(50, self._drain_stream_queue, self.stream_queue, on_done, [])
+    
+    def _stream_worker(self, chunks: Iterator[str], stream_queue: queue.Queue):
+        """Consume a text stream off the Tk thread, queueing each piece."""
+        try:
+            for text in chunks:
+                if stream_queue is not self.stream_queue:
+                    # Superseded; closing the generator drops the connection
+                    return
+                stream_queue.put(("text", text))
+            stream_queue.put(("done", None))
         except Exception as e:
+            stream_queue.put(("error", e))
+        finally:
+            chunks.close()
+    
+    def _drain_stream_queue(self, stream_queue: queue.Queue, on_done: Callable[[str], None],
+                            parts: List[str]):
+        """Append streamed text to the content view and hand over the full text at the end."""
+        if stream_queue is not self.stream_queue:
+            return
+        try:
+            while True:
+                kind, value = stream_queue.get_nowait()
+                if kind == "text":
+                    parts.append(value)
+                    self.frames["content"].append_stream(value)
+                    continue
+                
+                self.stream_queue = None
+                if kind == "error":
+                    messagebox.showerror("Error", f"Error generating response: {value}")
+                else:
+                    on_done("".join(parts))
+                return
+        except queue.Empty:
+            pass
+        
+        self.after(50, self._drain_stream_queue, stream_queue, on_done, parts)
+    
+    def _generate_checklist_for_all(self):
+        """Generate checklist items for every listed email in batched requests."""
+        if not claude_service or not claude_service.is_available():
             messagebox.showerror(
-                "Error", 
-                f"Error generating checklist item: {e}"
+                "Claude API Not Available", 
+                "Claude API is not configured. Please set CLAUDE_API_KEY in your .env file."
+            )
+            return
+        if self.fetch_queue:
+            messagebox.showinfo("Please Wait", "Wait for the email list to finish loading.")
+            return
+        if self.checklist_queue:
+            messagebox.showinfo("Please Wait", "A checklist is already being generated.")
+            return
+        if not self.email_data:
+            messagebox.showinfo("No Emails", "There are no listed emails to generate a checklist from.")
+            return
+        
+        records = list(self.email_data)
+        self.checklist_queue = queue.Queue()
+        self.frames["list"].show_progress(0, len(records), "Generating checklist for")
+        threading.Thread(
+            target=self._checklist_worker,
+            args=(records, self.checklist_queue),
+            daemon=True
+        ).start()
+        self.after(100, self._drain_checklist_queue, self.checklist_queue)
+    
+    def _checklist_worker(self, records: List[EmailRecord], checklist_queue: queue.Queue):
+        """Download bodies and generate the batched checklist off the Tk thread."""
+        try:
+            # Header-only lists have no bodies yet; fetch them without marking mail as read
+            self.email_service.load_email_bodies(records)
+            results = claude_service.generate_checklist_batch(
+                [
+                    {
+                        "id": str(record.uid),
+                        "subject": record.subject or "",
+                        "sender": record.sender or "",
+                        "body": record.body if record.has_body else ""
+                    }
+                    for record in records
+                ],
+                on_progress=lambda done, total: checklist_queue.put(("progress", done, total))
             )
+            failed = sum(1 for record in records if str(record.uid) not in results)
+            if failed:
+                # Answered emails are cached, so a retry only re-sends the failed ones
+                raise Exception(f"{failed} of {len(records)} emails could not be processed. Please try again.")
+            items = [item for record in records for item in results[str(record.uid)]]
+            checklist_queue.put(("done", items, 0))
+        except Exception as e:
+            checklist_queue.put(("error", e, 0))
+    
+    def _drain_checklist_queue(self, checklist_queue: queue.Queue):
+        """Show batch progress and offer the generated items once finished."""
+        try:
+            while True:
+                kind, value, total = checklist_queue.get_nowait()
+                if kind == "progress":
+                    self.frames["list"].show_progress(value, total, "Generating checklist for")
+                    continue
+                
+                self.checklist_queue = None
+                self.frames["list"].hide_progress()
+                if kind == "error":
+                    messagebox.showerror("Error", f"Error generating checklist: {value}")
+                elif not value:
+                    messagebox.showwarning(
+                        "No Items Generated",
+                        "No actionable items were found in the listed emails."
+                    )
+                else:
+                    self._offer_checklist_items(value)
+                return
+        except queue.Empty:
+            pass
+        
+        self.after(100, self._drain_checklist_queue, checklist_queue)
+    
+    def _offer_checklist_items(self, items: List[str]):
+        """Ask before adding a batch of generated items to the checklist."""
+        shown = 20
+        items_text = "\n".join(f"• {item}" for item in items[:shown])
+        if len(items) > shown:
+            items_text += f"\n...and {len(items) - shown} more"
+        
+        if messagebox.askyesno(
+            "Add Checklist Items",
+            f"Generated {len(items)} checklist items:\n\n{items_text}\n\nAdd all these items to your checklist?"
+        ):
+            for item in items:
+                self.frames["list"].checklist_listbox.insert(tk.END, item)
+            messagebox.showinfo("Success", f"Added {len(items)} items to your checklist!")
     
     def _on_close(self):
         """Handle application closing."""
+        self._cancel_fetch()
+        self.stream_queue = None
+        if self.idle_listener:
+            self.idle_listener.stop()
         self.email_service.disconnect()
+        self.message_store.close()
+        self.spam_blocker.close()
+        if self.spam_classifier:
+            self.spam_classifier.save()
+        if claude_service:
+            claude_service.close()
         self.destroy()
 
 
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+from email_utils import EmailRecord
+
+
+class MessageStore:
+    """Local SQLite cache of parsed emails keyed by folder, UIDVALIDITY and UID."""
+
+    # Keep well below SQLite's host-parameter limit
+    _QUERY_CHUNK = 500
+    # Bump when the schema changes; older caches are dropped and rebuilt
+    SCHEMA_VERSION = 2
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # Shared with background listeners, so serialize access ourselves
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        """Create the cache schema, discarding caches written by older versions."""
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        with self.connection:
+            if version != self.SCHEMA_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS messages")
+                self.connection.execute("DROP TABLE IF EXISTS folders")
+                self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS folders (
+                    folder TEXT PRIMARY KEY,
+                    uidvalidity INTEGER NOT NULL,
+                    last_uid INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS messages (
+                    folder TEXT NOT NULL,
+                    uid INTEGER NOT NULL,
+                    subject TEXT,
+                    sender TEXT,
+                    date TEXT,
+                    size INTEGER,
+                    body BLOB,
+                    charset TEXT,
+                    PRIMARY KEY (folder, uid)
+                )"""
+            )
+
+    def sync_folder(self, folder: str, uidvalidity: int) -> bool:
+        """Record the folder's UIDVALIDITY, dropping its cache if it changed.
+
+        Returns True if the cached messages are still valid.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT uidvalidity FROM folders WHERE folder = ?", (folder,)
+            ).fetchone()
+            if row and row[0] == uidvalidity:
+                return True
+
+            with self.connection:
+                self.connection.execute("DELETE FROM messages WHERE folder = ?", (folder,))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO folders (folder, uidvalidity, last_uid) VALUES (?, ?, 0)",
+                    (folder, uidvalidity)
+                )
+            return False
+
+    def get_last_uid(self, folder: str) -> int:
+        """Get the highest UID seen in a folder."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT last_uid FROM folders WHERE folder = ?", (folder,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_messages(self, folder: str, uids: List[int]) -> Dict[int, EmailRecord]:
+        """Get cached messages for the given UIDs, keyed by UID."""
+        messages = {}
+        for i in range(0, len(uids), self._QUERY_CHUNK):
+            chunk = uids[i:i + self._QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self.connection.execute(
+                    f"SELECT uid, subject, sender, date, size, body, charset FROM messages "
+                    f"WHERE folder = ? AND uid IN ({placeholders})",
+                    [folder, *chunk]
+                ).fetchall()
+            for uid, subject, sender, date, size, body, charset in rows:
+                messages[uid] = EmailRecord(uid, subject, sender, date, size, body, charset or "utf-8")
+        return messages
+
+    def save_messages(self, folder: str, emails: List[EmailRecord]) -> None:
+        """Insert or update parsed messages and advance the folder's last UID."""
+        if not emails:
+            return
+
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO messages (folder, uid, subject, sender, date, size, body, charset) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (folder, e.uid, e.subject, e.sender, e.date, e.size, e.raw_body, e.charset)
+                    for e in emails
+                ]
+            )
+            self.connection.execute(
+                "UPDATE folders SET last_uid = MAX(last_uid, ?) WHERE folder = ?",
+                (max(e.uid for e in emails), folder)
+            )
+
+    def save_body(self, folder: str, record: EmailRecord) -> None:
+        """Store a lazily downloaded message body."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE messages SET body = ?, charset = ? WHERE folder = ? AND uid = ?",
+                (record.raw_body, record.charset, folder, record.uid)
+            )
+
+    def delete_messages(self, folder: str, uids: List[int]) -> None:
+        """Forget messages that were moved or deleted on the server."""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM messages WHERE folder = ? AND uid = ?",
+                [(folder, uid) for uid in uids]
+            )
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        try:
+            with self._lock:
+                self.connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Mapping, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket; unlimited until it is configured."""
+
+    def __init__(self):
+        self.capacity: Optional[float] = None
+        self.rate: Optional[float] = None
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, capacity: float, rate: float, remaining: Optional[float] = None) -> None:
+        """Set the bucket size and refill rate (tokens per second), syncing to the server's count."""
+        with self._lock:
+            first_update = self.rate is None
+            self._refill()
+            self.capacity = capacity
+            self.rate = rate
+            if remaining is not None:
+                self.tokens = min(remaining, capacity)
+            elif first_update:
+                self.tokens = capacity
+            else:
+                self.tokens = min(self.tokens, capacity)
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until ``amount`` tokens are available, then take them."""
+        while True:
+            with self._lock:
+                if self.rate is None:
+                    return
+                self._refill()
+                # A request bigger than the whole bucket waits for a full bucket, not forever
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= needed
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """Paces API calls with request and input-token buckets fed by rate-limit headers.
+
+    Anthropic responses report per-minute limits and what remains in
+    ``anthropic-ratelimit-*`` headers. Each response re-syncs the buckets,
+    so callers slow down before the server starts rejecting requests.
+    """
+
+    HEADER_PREFIX = "anthropic-ratelimit-"
+
+    def __init__(self):
+        self.requests = TokenBucket()
+        self.input_tokens = TokenBucket()
+
+    def acquire(self, estimated_tokens: int) -> None:
+        """Wait for a request slot and the estimated input tokens."""
+        self.requests.acquire(1)
+        self.input_tokens.acquire(estimated_tokens)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Re-sync the buckets from a response's rate-limit headers."""
+        self._update_bucket(self.requests, headers, "requests")
+        # Newer responses split input and output tokens; older ones report a combined limit
+        if not self._update_bucket(self.input_tokens, headers, "input-tokens"):
+            self._update_bucket(self.input_tokens, headers, "tokens")
+
+    def _update_bucket(self, bucket: TokenBucket, headers: Mapping[str, str], kind: str) -> bool:
+        try:
+            limit = float(headers[f"{self.HEADER_PREFIX}{kind}-limit"])
+            remaining = headers.get(f"{self.HEADER_PREFIX}{kind}-remaining")
+            remaining = float(remaining) if remaining is not None else None
+        except (KeyError, ValueError):
+            return False
+        if limit <= 0:
+            return False
+
+        # Limits are per minute
+        bucket.configure(limit, limit / 60.0, remaining)
+        return True
@@ -1,75 +1,507 @@
+import csv
 import json
 import os
 import re
-from typing import Set, List
+import threading
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple
+from bloom_blocklist import BloomBlocklist
+from email_utils import EmailValidator, SenderParser
 
 
 class SpamBlocker:
-    """Handles spam blocking functionality for email addresses."""
-    
-    def __init__(self, blocked_file: str = "blocked_emails.json"):
+    """Handles spam blocking functionality for email addresses.
+
+    Block rules come in four forms:
+
+    - ``user@example.com`` blocks one address.
+    - ``*@example.com`` (or ``@example.com``) blocks every address at that domain.
+    - ``*.example.com`` (or ``*@*.example.com``) blocks example.com and all its subdomains.
+    - ``re:<pattern>`` blocks addresses matching a regular expression
+      (searched against the lower-cased address).
+
+    Rules are compiled into an index: a set for exact addresses, a trie of
+    reversed domain labels for domain rules, and one combined regular
+    expression for patterns. Checking a sender costs one set lookup, one
+    walk over its domain labels and one regex search. Patterns with groups
+    or global inline flags such as ``(?i)`` cannot be merged safely and
+    are searched on their own.
+
+    Changes are appended to a journal file (``<blocked_file>.journal``) and
+    fsynced, so a click costs one short write instead of a full rewrite.
+    Once the journal reaches ``compact_threshold`` entries it is folded
+    into the snapshot, which is replaced atomically. Startup loads the
+    snapshot and replays the journal on top of it.
+
+    A lock serializes changes so bulk imports can run on a
+    background thread while the GUI keeps reading the list.
+
+    Very large shared lists are not loaded into memory. They are opened as
+    read-only BloomBlocklist files and checked after the local rules,
+    by address and by ``@domain``.
+    """
+
+    FILE_VERSION = 2
+    PATTERN_PREFIX = "re:"
+
+    # Trie markers; "#" cannot appear in a domain label
+    _DOMAIN_MARK = "#domain"
+    _SUFFIX_MARK = "#suffix"
+    _DOMAIN_PATTERN = re.compile(r"^[a-z0-9-]+(\.[a-z0-9-]+)+$")
+    # Flags of a pattern without global inline flags
+    _DEFAULT_FLAGS = re.compile("").flags
+    # CSV header names recognised as the rule column on import
+    CSV_COLUMNS = ("rule", "email", "address", "sender")
+
+    def __init__(self, blocked_file: str = "blocked_emails.json", compact_threshold: int = 1000,
+                 shared_list_files: Optional[List[str]] = None):
         self.blocked_file = blocked_file
-        self.blocked_emails = self.load_blocked_emails()
-    
-    def load_blocked_emails(self) -> Set[str]:
-        """Load blocked email addresses from file."""
+        self.journal_file = blocked_file + ".journal"
+        self.compact_threshold = max(1, compact_threshold)
+        self.rules: Set[str] = set()
+        self._exact: Set[str] = set()
+        self._domain_trie: Dict = {}
+        self._patterns: Dict[str, str] = {}
+        # Replaced as a whole under the lock, so readers always see one consistent list
+        self._pattern_regexes: List[re.Pattern] = []
+        self._patterns_changed = False
+        self._needs_compaction = False
+        self._journal: Optional[TextIO] = None
+        self._journal_entries = 0
+        self._lock = threading.RLock()
+        self.shared_lists: List[BloomBlocklist] = []
+
+        for path in shared_list_files or []:
+            try:
+                self.shared_lists.append(BloomBlocklist(path))
+            except Exception as e:
+                print(f"Error opening shared blocklist {path}: {e}")
+
+        for rule in self.load_blocked_emails():
+            try:
+                self._index_rule(rule)
+            except ValueError as e:
+                print(f"Skipping invalid block rule {rule!r}: {e}")
+        self._replay_journal()
+        self._rebuild_patterns()
+
+        if self._needs_compaction or self._journal_entries >= self.compact_threshold:
+            self.compact()
+
+    @staticmethod
+    def parse_rule(rule: str) -> Tuple[str, str]:
+        """Normalize a block rule into ``(kind, value)``.
+
+        ``kind`` is one of ``exact``, ``domain``, ``suffix`` or ``pattern``.
+        Raises ValueError for rules that are not valid.
+        """
+        rule = rule.strip()
+        if rule.lower().startswith(SpamBlocker.PATTERN_PREFIX):
+            pattern = rule[len(SpamBlocker.PATTERN_PREFIX):]
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern: {e}")
+            return "pattern", pattern
+
+        rule = rule.lower()
+        if rule.startswith("*@*."):
+            kind, domain = "suffix", rule[4:]
+        elif rule.startswith("*."):
+            kind, domain = "suffix", rule[2:]
+        elif rule.startswith("*@"):
+            kind, domain = "domain", rule[2:]
+        elif rule.startswith("@"):
+            kind, domain = "domain", rule[1:]
+        elif EmailValidator.is_valid_email(rule):
+            return "exact", rule
+        else:
+            raise ValueError("Not an email address, domain rule or re: pattern.")
+
+        if not SpamBlocker._DOMAIN_PATTERN.match(domain):
+            raise ValueError(f"Invalid domain: {domain}")
+        return kind, domain
+
+    @staticmethod
+    def is_valid_rule(rule: str) -> bool:
+        """Check whether a string is a valid block rule."""
+        try:
+            SpamBlocker.parse_rule(rule)
+            return True
+        except ValueError:
+            return False
+
+    @staticmethod
+    def format_rule(kind: str, value: str) -> str:
+        """Render a parsed rule in its canonical stored form."""
+        if kind == "domain":
+            return f"*@{value}"
+        if kind == "suffix":
+            return f"*.{value}"
+        if kind == "pattern":
+            return f"{SpamBlocker.PATTERN_PREFIX}{value}"
+        return value
+
+    def load_blocked_emails(self) -> List[str]:
+        """Load block rules from file, migrating the old plain-list format."""
         try:
             if os.path.exists(self.blocked_file):
                 with open(self.blocked_file, 'r') as f:
-                    return set(json.load(f))
-            return set()
+                    data = json.load(f)
+
+                if isinstance(data, list):
+                    # Version 1 files are a bare list of addresses; rewrite them once loaded
+                    self._needs_compaction = True
+                    return data
+                return data.get("rules", [])
+            return []
         except Exception as e:
             print(f"Error loading blocked emails: {e}")
-            return set()
-    
-    def save_blocked_emails(self) -> None:
-        """Save blocked email addresses to file."""
+            return []
+
+    def save_blocked_emails(self) -> bool:
+        """Atomically replace the snapshot file with the current rules."""
+        temp_file = self.blocked_file + ".tmp"
         try:
-            with open(self.blocked_file, 'w') as f:
-                json.dump(list(self.blocked_emails), f, indent=2)
+            with open(temp_file, 'w') as f:
+                json.dump({"version": self.FILE_VERSION, "rules": sorted(self.rules)}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.blocked_file)
+            return True
         except Exception as e:
             print(f"Error saving blocked emails: {e}")
-    
+            return False
+
+    def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and truncate it.
+
+        Replaying adds and removes is idempotent, so a crash between the
+        snapshot rename and the truncation loses nothing.
+        """
+        with self._lock:
+            if not self.save_blocked_emails():
+                return
+
+            self._close_journal()
+            try:
+                with open(self.journal_file, 'w'):
+                    pass
+                self._journal_entries = 0
+            except Exception as e:
+                print(f"Error truncating blocklist journal: {e}")
+
+    def close(self) -> None:
+        """Compact pending journal entries and close the journal and shared lists."""
+        with self._lock:
+            if self._journal_entries:
+                self.compact()
+            self._close_journal()
+
+        for shared in self.shared_lists:
+            shared.close()
+        self.shared_lists = []
+
     def add_blocked_email(self, email_address: str) -> None:
-        """Add an email address to the blocked list."""
-        email_address = email_address.lower().strip()
-        self.blocked_emails.add(email_address)
-        self.save_blocked_emails()
-    
+        """Add an email address or block rule to the blocked list."""
+        self.parse_rule(email_address)
+        self.add_many([email_address])
+
     def remove_blocked_email(self, email_address: str) -> bool:
-        """Remove an email address from the blocked list."""
-        email_address = email_address.lower().strip()
-        if email_address in self.blocked_emails:
-            self.blocked_emails.remove(email_address)
-            self.save_blocked_emails()
-            return True
-        return False
-    
+        """Remove an email address or block rule from the blocked list."""
+        return self.remove_many([email_address]) == 1
+
+    def add_many(self, rules: Iterable[str]) -> Tuple[int, List[str]]:
+        """Add many rules with one validation pass and one write.
+
+        Returns the number of new rules and the entries that were not valid.
+        """
+        added, invalid = [], []
+        with self._lock:
+            for rule in rules:
+                try:
+                    kind, value = self.parse_rule(rule)
+                except ValueError:
+                    invalid.append(rule)
+                    continue
+
+                if self.format_rule(kind, value) not in self.rules:
+                    added.append(self._index_parsed(kind, value))
+            self._rebuild_patterns()
+            self._persist("add", added)
+        return len(added), invalid
+
+    def remove_many(self, rules: Iterable[str]) -> int:
+        """Remove many rules with one write; returns how many were removed."""
+        removed = []
+        with self._lock:
+            for rule in rules:
+                try:
+                    kind, value = self.parse_rule(rule)
+                except ValueError:
+                    continue
+
+                if self.format_rule(kind, value) in self.rules:
+                    removed.append(self._unindex_parsed(kind, value))
+            self._rebuild_patterns()
+            self._persist("remove", removed)
+        return len(removed)
+
+    @staticmethod
+    def read_rule_file(path: str) -> List[str]:
+        """Read rules from a .json, .csv or plain-text (one per line) list.
+
+        JSON may be a bare list or an object with a ``rules`` list. CSV uses
+        the first column, or a column named in CSV_COLUMNS when the first
+        row is a header. Blank lines and ``#`` comments in text files are
+        ignored.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            if extension == ".json":
+                data = json.load(f)
+                rules = data.get("rules", []) if isinstance(data, dict) else data
+                return [str(rule) for rule in rules]
+
+            if extension == ".csv":
+                rows = [row for row in csv.reader(f) if row]
+                column = 0
+                if rows and not SpamBlocker.is_valid_rule(rows[0][0]):
+                    header = [cell.strip().lower() for cell in rows[0]]
+                    column = next(
+                        (header.index(name) for name in SpamBlocker.CSV_COLUMNS if name in header), 0
+                    )
+                    rows = rows[1:]
+                return [row[column] for row in rows if len(row) > column]
+
+            lines = (line.strip() for line in f)
+            return [line for line in lines if line and not line.startswith("#")]
+
+    def import_rules(self, path: str) -> Tuple[int, List[str]]:
+        """Import a rule list file; returns the new rule count and invalid entries."""
+        return self.add_many(self.read_rule_file(path))
+
+    def export_rules(self, path: str) -> None:
+        """Write the rules to a .json, .csv or plain-text file based on its extension."""
+        rules = self.get_blocked_emails()
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            if extension == ".json":
+                json.dump({"version": self.FILE_VERSION, "rules": rules}, f, indent=2)
+            elif extension == ".csv":
+                writer = csv.writer(f)
+                writer.writerow(["rule"])
+                writer.writerows([rule] for rule in rules)
+            else:
+                f.writelines(f"{rule}\n" for rule in rules)
+
     def is_blocked(self, email_address: str) -> bool:
-        """Check if an email address is blocked."""
+        """Check if an email address matches any block rule."""
         if not email_address:
             return False
-        
-        # Extract email address from "Name <email@domain.com>" format
-        email_match = re.search(r'<([^>]+)>', email_address)
-        if email_match:
-            email_address = email_match.group(1)
-        
-        return email_address.lower().strip() in self.blocked_emails
-    
+
+        sender = SenderParser.parse(email_address)
+        if sender.address in self._exact:
+            return True
+
+        if sender.domain and self._trie_matches(sender.domain):
+            return True
+
+        if any(regex.search(sender.address) for regex in self._pattern_regexes):
+            return True
+
+        domain_entry = f"@{sender.domain}"
+        return any(
+            sender.address in shared or domain_entry in shared
+            for shared in self.shared_lists
+        )
+
     def get_blocked_emails(self) -> List[str]:
-        """Get sorted list of blocked email addresses."""
-        return sorted(list(self.blocked_emails))
-    
+        """Get sorted list of block rules."""
+        with self._lock:
+            return sorted(self.rules)
+
+    def get_server_search_terms(self) -> List[str]:
+        """Get From-header substrings that a server-side SEARCH can exclude.
+
+        Terms end with ``>`` so they only match the bracketed address and
+        cannot hit look-alike senders through IMAP substring matching.
+        Pattern rules have no server-side equivalent and are skipped.
+        """
+        with self._lock:
+            return sorted(term for rule in self.rules for term in self.search_terms_for_rule(rule))
+
+    @staticmethod
+    def search_terms_for_rule(rule: str) -> List[str]:
+        """Get the From-header SEARCH substrings matching one rule (empty for patterns)."""
+        kind, value = SpamBlocker.parse_rule(rule)
+        if kind == "exact":
+            return [f"<{value}>"]
+        if kind == "domain":
+            return [f"@{value}>"]
+        if kind == "suffix":
+            return [f"@{value}>", f".{value}>"]
+        return []
+
     def extract_email_address(self, email_string: str) -> str:
-        """Extract clean email address from various formats."""
-        if not email_string:
-            return ""
-        
-        # Extract email address from "Name <email@domain.com>" format
-        email_match = re.search(r'<([^>]+)>', email_string)
-        if email_match:
-            return email_match.group(1).strip()
-        
-        # Return the original string if no angle brackets found
-        return email_string.strip()
\ No newline at end of file
+        """Extract the lower-cased email address from various formats."""
+        return SenderParser.parse(email_string).address
+
+    def _index_rule(self, rule: str) -> None:
+        """Parse a rule and add it to the in-memory index."""
+        self._index_parsed(*self.parse_rule(rule))
+
+    def _unindex_rule(self, rule: str) -> None:
+        """Parse a rule and remove it from the in-memory index."""
+        self._unindex_parsed(*self.parse_rule(rule))
+
+    def _index_parsed(self, kind: str, value: str) -> str:
+        """Add a parsed rule to the in-memory index; returns its canonical form."""
+        rule = self.format_rule(kind, value)
+        self.rules.add(rule)
+
+        if kind == "exact":
+            self._exact.add(value)
+        elif kind == "pattern":
+            self._patterns[rule] = value
+            self._patterns_changed = True
+        else:
+            node = self._domain_trie
+            for label in reversed(value.split(".")):
+                node = node.setdefault(label, {})
+            node[self._DOMAIN_MARK if kind == "domain" else self._SUFFIX_MARK] = True
+        return rule
+
+    def _unindex_parsed(self, kind: str, value: str) -> str:
+        """Remove a parsed rule from the in-memory index; returns its canonical form."""
+        rule = self.format_rule(kind, value)
+        self.rules.discard(rule)
+
+        if kind == "exact":
+            self._exact.discard(value)
+        elif kind == "pattern":
+            self._patterns.pop(rule, None)
+            self._patterns_changed = True
+        else:
+            self._trie_remove(value, self._DOMAIN_MARK if kind == "domain" else self._SUFFIX_MARK)
+        return rule
+
+    def _replay_journal(self) -> None:
+        """Apply journaled adds and removes on top of the loaded snapshot."""
+        if not os.path.exists(self.journal_file):
+            return
+
+        try:
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        op, rule = entry["op"], entry["rule"]
+                    except (ValueError, KeyError, TypeError):
+                        # A torn final line from a crash mid-append; drop it at the next compaction
+                        print("Ignoring incomplete blocklist journal entry.")
+                        self._needs_compaction = True
+                        break
+
+                    try:
+                        if op == "add":
+                            self._index_rule(rule)
+                        elif op == "remove":
+                            self._unindex_rule(rule)
+                    except ValueError as e:
+                        print(f"Skipping invalid journaled rule {rule!r}: {e}")
+                    self._journal_entries += 1
+        except Exception as e:
+            print(f"Error replaying blocklist journal: {e}")
+
+    def _persist(self, op: str, rules: List[str]) -> None:
+        """Record a batch of changes with a single write.
+
+        Batches that would push the journal past the compaction threshold
+        go straight into a new snapshot instead.
+        """
+        if not rules:
+            return
+        if self._journal_entries + len(rules) >= self.compact_threshold:
+            self.compact()
+        else:
+            self._append_journal(op, rules)
+
+    def _append_journal(self, op: str, rules: List[str]) -> None:
+        """Durably append changes to the journal with one fsync."""
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'a')
+            self._journal.write("".join(json.dumps({"op": op, "rule": rule}) + "\n" for rule in rules))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal_entries += len(rules)
+        except Exception as e:
+            print(f"Error writing blocklist journal: {e}")
+
+    def _close_journal(self) -> None:
+        """Close the open journal handle, if any."""
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except Exception:
+                pass
+            self._journal = None
+
+    def _trie_matches(self, domain: str) -> bool:
+        """Walk the domain's labels from the TLD down looking for a matching rule."""
+        labels = domain.split(".")
+        node = self._domain_trie
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.get(label)
+            if node is None:
+                return False
+            if self._SUFFIX_MARK in node:
+                return True
+            if depth == len(labels) and self._DOMAIN_MARK in node:
+                return True
+        return False
+
+    def _trie_remove(self, domain: str, mark: str) -> None:
+        """Remove a domain rule marker and prune empty trie branches."""
+        path = [self._domain_trie]
+        labels = list(reversed(domain.split(".")))
+        for label in labels:
+            node = path[-1].get(label)
+            if node is None:
+                return
+            path.append(node)
+
+        path[-1].pop(mark, None)
+        for label, parent, node in zip(reversed(labels), reversed(path[:-1]), reversed(path[1:])):
+            if node:
+                break
+            del parent[label]
+
+    def _rebuild_patterns(self) -> None:
+        """Recompile the pattern rules after changes; called with the lock held.
+
+        Patterns without groups or global flags are merged into one
+        alternation. Merging the others would renumber backreferences,
+        redefine group names or move flags away from the start, so each of
+        those is searched separately.
+        """
+        if self._patterns_changed:
+            mergeable, separate = [], []
+            for pattern in self._patterns.values():
+                compiled = re.compile(pattern)
+                if compiled.groups or compiled.flags != self._DEFAULT_FLAGS:
+                    separate.append(compiled)
+                else:
+                    mergeable.append(pattern)
+
+            regexes = separate
+            if len(mergeable) == 1:
+                regexes = [re.compile(mergeable[0])] + separate
+            elif mergeable:
+                try:
+                    regexes = [re.compile("|".join(f"(?:{pattern})" for pattern in mergeable))] + separate
+                except re.error as e:
+                    print(f"Searching block patterns one by one: {e}")
+                    regexes = [re.compile(pattern) for pattern in mergeable] + separate
+            self._pattern_regexes = regexes
+            self._patterns_changed = False
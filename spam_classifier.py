@@ -0,0 +1,184 @@
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List
+from email_utils import EmailRecord, SenderParser
+
+try:
+    import numpy as np
+except ImportError:  # Scoring is optional; the app runs without it
+    np = None
+
+
+class SpamClassifier:
+    """Offline hashed-token naive Bayes spam scorer.
+
+    Each message becomes a set of tokens from its subject, sender name,
+    sender domain and (when downloaded) body. Tokens are hashed into a
+    fixed number of buckets, so the model is two count arrays no matter
+    how many distinct words it sees. Messages from blocked senders are
+    learned as spam and opened messages as ham; learning updates the
+    counts in place, so there is never a full retrain. The label given to
+    each UID is saved with the counts, so a message opened again after a
+    restart is not counted twice.
+
+    Scoring a batch hashes each distinct token once, then uses NumPy to
+    gather per-token log-likelihood ratios and sum them per message with
+    ``bincount``.
+    """
+
+    NUM_FEATURES = 1 << 18
+    # Laplace smoothing for unseen buckets
+    ALPHA = 1.0
+    # Examples needed in each class before messages are hidden
+    MIN_EXAMPLES = 10
+    # Only the start of a body is tokenized
+    BODY_CHARS = 2000
+    SPAM, HAM = 1, 0
+
+    _TOKEN_PATTERN = re.compile(r"[a-z0-9$€£%!']{2,30}")
+
+    def __init__(self, model_file: str, threshold: float = 0.95):
+        self.model_file = model_file
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._labels: Dict[int, int] = {}
+        self._log_ratio = None
+        self._dirty = False
+
+        self.counts = np.zeros((2, self.NUM_FEATURES), dtype=np.int32)
+        self.doc_counts = np.zeros(2, dtype=np.int64)
+        self.load()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether NumPy is installed."""
+        return np is not None
+
+    def is_trained(self) -> bool:
+        """Check whether both classes have enough examples to score with."""
+        return bool((self.doc_counts >= self.MIN_EXAMPLES).all())
+
+    def load(self) -> None:
+        """Load saved counts, keeping an empty model if there are none."""
+        try:
+            if os.path.exists(self.model_file):
+                with np.load(self.model_file) as data:
+                    if data["counts"].shape == self.counts.shape:
+                        self.counts = data["counts"].astype(np.int32)
+                        self.doc_counts = data["doc_counts"].astype(np.int64)
+                        # Models saved before labels were kept have none; they are learned again
+                        if "label_uids" in data:
+                            self._labels = dict(zip(data["label_uids"].tolist(), data["label_values"].tolist()))
+        except Exception as e:
+            print(f"Error loading spam model: {e}")
+
+    def save(self) -> None:
+        """Write the model atomically if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            temp_file = self.model_file + ".tmp"
+            try:
+                model_dir = os.path.dirname(self.model_file)
+                if model_dir:
+                    os.makedirs(model_dir, exist_ok=True)
+                with open(temp_file, "wb") as f:
+                    np.savez_compressed(
+                        f, counts=self.counts, doc_counts=self.doc_counts,
+                        label_uids=np.fromiter(self._labels.keys(), dtype=np.int64, count=len(self._labels)),
+                        label_values=np.fromiter(self._labels.values(), dtype=np.int8, count=len(self._labels))
+                    )
+                os.replace(temp_file, self.model_file)
+                self._dirty = False
+            except Exception as e:
+                print(f"Error saving spam model: {e}")
+
+    def learn(self, records: List[EmailRecord], is_spam: bool) -> None:
+        """Incrementally train on messages, relabelling any learned before."""
+        label = self.SPAM if is_spam else self.HAM
+        with self._lock:
+            for record in records:
+                previous = self._labels.get(record.uid)
+                if previous == label:
+                    continue
+
+                features = np.unique(self._hash_tokens(self._tokens(record)))
+                if previous is not None:
+                    # The user changed their mind; move the message to the other class
+                    np.subtract.at(self.counts[previous], features, 1)
+                    self.doc_counts[previous] -= 1
+                np.add.at(self.counts[label], features, 1)
+                self.doc_counts[label] += 1
+                self._labels[record.uid] = label
+
+            self._log_ratio = None
+            self._dirty = True
+
+    def score(self, records: List[EmailRecord]) -> "np.ndarray":
+        """Get the spam probability of each message in one vectorized pass."""
+        if not records:
+            return np.zeros(0)
+
+        # Hash each distinct token in the batch once
+        token_ids: Dict[str, int] = {}
+        features, owners = [], []
+        for position, record in enumerate(records):
+            for token in set(self._tokens(record)):
+                feature = token_ids.get(token)
+                if feature is None:
+                    feature = token_ids[token] = zlib.crc32(token.encode("utf-8")) % self.NUM_FEATURES
+                features.append(feature)
+                owners.append(position)
+
+        with self._lock:
+            log_ratio = self._log_likelihood_ratio()
+            log_prior = np.log((self.doc_counts[self.SPAM] + 1) / (self.doc_counts[self.HAM] + 1))
+
+        totals = np.bincount(
+            np.asarray(owners, dtype=np.intp),
+            weights=log_ratio[np.asarray(features, dtype=np.intp)],
+            minlength=len(records)
+        ) + log_prior
+        return 1.0 / (1.0 + np.exp(-np.clip(totals, -500, 500)))
+
+    def filter(self, records: List[EmailRecord]) -> List[EmailRecord]:
+        """Drop messages scoring at or above the threshold; untrained models keep everything."""
+        if not records or not self.is_trained():
+            return records
+        scores = self.score(records)
+        return [record for record, score in zip(records, scores) if score < self.threshold]
+
+    def _log_likelihood_ratio(self) -> "np.ndarray":
+        """Per-bucket log P(token|spam) - log P(token|ham), rebuilt after training."""
+        if self._log_ratio is None:
+            smoothed = self.counts + self.ALPHA
+            probabilities = smoothed / (self.doc_counts[:, None] + 2 * self.ALPHA)
+            self._log_ratio = np.log(probabilities[self.SPAM]) - np.log(probabilities[self.HAM])
+        return self._log_ratio
+
+    def _hash_tokens(self, tokens: List[str]) -> "np.ndarray":
+        """Map tokens to feature buckets."""
+        return np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) % self.NUM_FEATURES for token in tokens),
+            dtype=np.intp,
+            count=len(tokens)
+        )
+
+    @classmethod
+    def _tokens(cls, record: EmailRecord) -> List[str]:
+        """Tokens for one message, prefixed by the field they came from."""
+        sender = SenderParser.parse(record.sender)
+        tokens = [f"s:{word}" for word in cls._TOKEN_PATTERN.findall((record.subject or "").lower())]
+        tokens.extend(f"n:{word}" for word in cls._TOKEN_PATTERN.findall(sender.display_name.lower()))
+
+        # Every parent of the sender's domain, so new subdomains still match
+        labels = sender.domain.split(".") if sender.domain else []
+        tokens.extend(f"d:{'.'.join(labels[i:])}" for i in range(len(labels) - 1))
+
+        if record.has_body:
+            tokens.extend(
+                f"b:{word}" for word in cls._TOKEN_PATTERN.findall(record.body[:cls.BODY_CHARS].lower())
+            )
+        return tokens
@@ -0,0 +1,85 @@
+import unittest
+from email_preprocessor import EmailPreprocessor
+
+
+class CleanTest(unittest.TestCase):
+    def test_only_paragraph_is_kept(self):
+        body = "Can you unsubscribe me from the vendor newsletter list?"
+        self.assertEqual(EmailPreprocessor.clean(body), body)
+
+    def test_trailing_request_mentioning_boilerplate_is_kept(self):
+        body = "Hi team,\n\nPlease review the updated privacy policy and sign off by Friday."
+        self.assertEqual(EmailPreprocessor.clean(body), body)
+
+    def test_trailing_question_mentioning_boilerplate_is_kept(self):
+        body = "Hi,\n\nQuick one: is this info confidential information or can I share it with the client?"
+        self.assertEqual(EmailPreprocessor.clean(body), body)
+
+    def test_trailing_disclaimer_is_dropped(self):
+        body = (
+            "Hi,\n\nThe report is attached.\n\n"
+            "CONFIDENTIALITY NOTICE: This email and any attachments are intended solely for the use "
+            "of the individual to whom they are addressed.\n\n"
+            "Unsubscribe | Manage your email preferences | Privacy policy"
+        )
+        self.assertEqual(EmailPreprocessor.clean(body), "Hi,\n\nThe report is attached.")
+
+    def test_boilerplate_wording_must_dominate(self):
+        body = (
+            "Hi,\n\nThe quarterly numbers came in above plan across every region, and the team "
+            "deserves credit for it. Details are in the privacy policy appendix."
+        )
+        self.assertEqual(EmailPreprocessor.clean(body), body)
+
+    def test_bare_double_dash_is_not_a_signature(self):
+        body = "Agenda:\n--\nItem one: please review"
+        self.assertEqual(EmailPreprocessor.clean(body), body)
+
+    def test_standard_signature_delimiter(self):
+        self.assertEqual(EmailPreprocessor.clean("Please review.\n-- \nAlex\nAcme Corp"), "Please review.")
+
+    def test_sign_off_followed_by_request_is_kept(self):
+        body = "Hi Bob,\n\nThanks\n\nCould you send the Q3 report by Friday?\n\nSam"
+        self.assertEqual(EmailPreprocessor.clean(body), body)
+
+    def test_sign_off_followed_by_name_is_cut(self):
+        self.assertEqual(
+            EmailPreprocessor.clean("Please review the draft.\n\nBest regards,\nAlex Smith\nDirector"),
+            "Please review the draft."
+        )
+
+    def test_forward_under_short_note_is_kept(self):
+        body = (
+            "FYI, see below.\n\nFrom: Alice <a@example.com>\nSent: Monday\nTo: Sam\nSubject: FW: Contract\n\n"
+            "Please sign the attached contract by Friday."
+        )
+        self.assertIn("Please sign the attached contract", EmailPreprocessor.clean(body))
+
+    def test_reply_history_is_cut(self):
+        body = "Sounds good.\n\nOn Mon, May 8, 2023 at 10:02 AM Sam <s@example.com> wrote:\n> old text"
+        self.assertEqual(EmailPreprocessor.clean(body), "Sounds good.")
+
+
+class FitTest(unittest.TestCase):
+    def test_text_within_budget_is_unchanged(self):
+        self.assertEqual(EmailPreprocessor.fit("Short text.", 100), "Short text.")
+
+    def test_tiny_budgets_do_not_wrap_around(self):
+        paragraph = "word " * 200
+        for max_tokens in (0, 1, 2):
+            with self.subTest(max_tokens=max_tokens):
+                fitted = EmailPreprocessor.fit(paragraph, max_tokens)
+                self.assertLessEqual(len(fitted), max_tokens * EmailPreprocessor.CHARS_PER_TOKEN +
+                                     len(EmailPreprocessor.ELISION))
+                self.assertTrue(fitted.endswith(EmailPreprocessor.ELISION))
+
+    def test_request_paragraph_is_kept_over_filler(self):
+        text = "\n\n".join(["Background filler text. " * 20, "Could you approve the budget by Friday?",
+                            "More filler about history. " * 20])
+        fitted = EmailPreprocessor.fit(text, 30)
+        self.assertIn("Could you approve the budget by Friday?", fitted)
+        self.assertNotIn("filler", fitted.replace(EmailPreprocessor.ELISION, ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from spam_blocker import SpamBlocker
+
+
+class SpamBlockerTestCase(unittest.TestCase):
+    """Base case giving each test a blocker backed by a temporary file."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.blocked_file = os.path.join(self.tmp.name, "blocked_emails.json")
+        self.blocker = SpamBlocker(self.blocked_file)
+
+    def tearDown(self):
+        self.blocker.close()
+        self.tmp.cleanup()
+
+    def reopen(self) -> SpamBlocker:
+        """Close the blocker and load a new one from the same files."""
+        self.blocker.close()
+        self.blocker = SpamBlocker(self.blocked_file)
+        return self.blocker
+
+
+class ParseRuleTest(unittest.TestCase):
+    def test_exact_address_is_lower_cased(self):
+        self.assertEqual(SpamBlocker.parse_rule("  Spam@Example.COM "), ("exact", "spam@example.com"))
+
+    def test_domain_forms(self):
+        self.assertEqual(SpamBlocker.parse_rule("*@Example.com"), ("domain", "example.com"))
+        self.assertEqual(SpamBlocker.parse_rule("@example.com"), ("domain", "example.com"))
+
+    def test_suffix_forms(self):
+        self.assertEqual(SpamBlocker.parse_rule("*.example.com"), ("suffix", "example.com"))
+        self.assertEqual(SpamBlocker.parse_rule("*@*.example.com"), ("suffix", "example.com"))
+
+    def test_pattern_keeps_its_case(self):
+        self.assertEqual(SpamBlocker.parse_rule("RE:(?i)Promo"), ("pattern", "(?i)Promo"))
+
+    def test_invalid_rules(self):
+        for rule in ("not an address", "*@bad_domain", "*.com", "re:(unclosed", ""):
+            with self.subTest(rule=rule):
+                self.assertFalse(SpamBlocker.is_valid_rule(rule))
+                with self.assertRaises(ValueError):
+                    SpamBlocker.parse_rule(rule)
+
+    def test_format_round_trip(self):
+        for rule in ("spam@example.com", "*@example.com", "*.example.com", "re:^news@"):
+            with self.subTest(rule=rule):
+                self.assertEqual(SpamBlocker.format_rule(*SpamBlocker.parse_rule(rule)), rule)
+
+
+class DomainTrieTest(SpamBlockerTestCase):
+    def test_domain_rule_matches_only_that_domain(self):
+        self.blocker.add_blocked_email("*@example.com")
+        self.assertTrue(self.blocker.is_blocked("Someone <anyone@Example.com>"))
+        self.assertFalse(self.blocker.is_blocked("anyone@mail.example.com"))
+        self.assertFalse(self.blocker.is_blocked("anyone@badexample.com"))
+
+    def test_suffix_rule_matches_domain_and_subdomains(self):
+        self.blocker.add_blocked_email("*.example.com")
+        self.assertTrue(self.blocker.is_blocked("anyone@example.com"))
+        self.assertTrue(self.blocker.is_blocked("anyone@a.b.example.com"))
+        self.assertFalse(self.blocker.is_blocked("anyone@example.org"))
+        self.assertFalse(self.blocker.is_blocked("anyone@badexample.com"))
+
+    def test_remove_prunes_only_that_rule(self):
+        self.blocker.add_many(["*@mail.example.com", "*.example.com"])
+        self.assertTrue(self.blocker.remove_blocked_email("*.example.com"))
+        self.assertTrue(self.blocker.is_blocked("anyone@mail.example.com"))
+        self.assertFalse(self.blocker.is_blocked("anyone@example.com"))
+
+        self.assertTrue(self.blocker.remove_blocked_email("*@mail.example.com"))
+        self.assertEqual(self.blocker._domain_trie, {})
+
+    def test_rules_survive_reload(self):
+        self.blocker.add_many(["spam@example.com", "*.example.org", "re:^promo"])
+        self.blocker.remove_blocked_email("spam@example.com")
+        blocker = self.reopen()
+        self.assertEqual(blocker.get_blocked_emails(), ["*.example.org", "re:^promo"])
+        self.assertTrue(blocker.is_blocked("x@news.example.org"))
+        self.assertTrue(blocker.is_blocked("promo@shop.com"))
+        self.assertFalse(blocker.is_blocked("spam@example.com"))
+
+
+class PatternCombinationTest(SpamBlockerTestCase):
+    def test_plain_patterns_share_one_regex(self):
+        self.blocker.add_many(["re:^promo", "re:deals\\d+@"])
+        self.assertEqual(len(self.blocker._pattern_regexes), 1)
+        self.assertTrue(self.blocker.is_blocked("promo@shop.com"))
+        self.assertTrue(self.blocker.is_blocked("deals42@shop.com"))
+        self.assertFalse(self.blocker.is_blocked("friend@shop.com"))
+
+    def test_global_inline_flags(self):
+        self.blocker.add_many(["re:^news", "re:(?i)promo"])
+        self.assertTrue(self.blocker.is_blocked("promo@shop.com"))
+        self.assertTrue(self.blocker.is_blocked("news@shop.com"))
+
+    def test_duplicate_group_names(self):
+        self.blocker.add_many(["re:^(?P<user>sale)@", "re:^(?P<user>offer)@"])
+        self.assertTrue(self.blocker.is_blocked("sale@shop.com"))
+        self.assertTrue(self.blocker.is_blocked("offer@shop.com"))
+
+    def test_backreferences_keep_their_groups(self):
+        self.blocker.add_many(["re:^(x)y@", "re:^(\\w)\\1\\1@"])
+        self.assertTrue(self.blocker.is_blocked("aaa@shop.com"))
+        self.assertFalse(self.blocker.is_blocked("xx@shop.com"))
+        self.assertTrue(self.blocker.is_blocked("xy@shop.com"))
+
+    def test_patterns_rebuilt_after_removal(self):
+        self.blocker.add_many(["re:^promo", "re:(?i)deals"])
+        self.blocker.remove_blocked_email("re:^promo")
+        self.assertFalse(self.blocker.is_blocked("promo@shop.com"))
+        self.assertTrue(self.blocker.is_blocked("deals@shop.com"))
+
+
+class ConcurrencyTest(SpamBlockerTestCase):
+    def test_is_blocked_during_pattern_imports(self):
+        errors = []
+        done = threading.Event()
+
+        def check():
+            while not done.is_set():
+                try:
+                    self.blocker.is_blocked("someone@example.com")
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        # Switch threads often so a reader catches the rules mid-update
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        checker = threading.Thread(target=check)
+        checker.start()
+        try:
+            for n in range(200):
+                self.blocker.add_many([f"re:^sender{n}@", f"re:^(?P<user>other{n})@"])
+        finally:
+            done.set()
+            checker.join()
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertTrue(self.blocker.is_blocked("sender199@example.com"))
+        self.assertTrue(self.blocker.is_blocked("other0@example.com"))
+
+
+if __name__ == "__main__":
+    unittest.main()